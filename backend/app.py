@@ -1,6 +1,7 @@
 import os
 import json
 import uuid
+import asyncio
 import time
 import logging
 from typing import Optional
@@ -15,6 +16,9 @@ from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
+import metricas
+from routers import sessao, matches, vagas, screenshot, fala, descrever_site
+
 # Carrega variáveis do .env (procura um ficheiro .env na pasta atual)
 load_dotenv()
 
@@ -86,6 +90,31 @@ templates = Jinja2Templates(directory=APP_DIR / "templates")
 
 # --- FIM DA CORREÇÃO ---
 
+app.include_router(sessao.router)
+app.include_router(matches.router)
+app.include_router(vagas.router)
+app.include_router(screenshot.router)
+app.include_router(fala.router)
+app.include_router(descrever_site.router)
+
+@app.on_event("startup")
+async def aquecer():
+    """Aquece o worker antes do primeiro pedido: navegador, template e índice de vagas."""
+    inicio = time.perf_counter()
+    templates.get_template("webrtc.html")
+    # Com preload_app o índice já vem do master; sem ele, é carregado aqui
+    await asyncio.to_thread(vagas.obter_indice)
+    try:
+        await screenshot.pool.iniciar()
+    except Exception:
+        # Sem Chromium o resto da API continua útil; o pool tenta de novo no primeiro pedido
+        logger.exception("Falha ao iniciar o navegador no aquecimento.")
+    logger.info("Worker %s aquecido em %.1f s.", os.getpid(), time.perf_counter() - inicio)
+
+@app.on_event("shutdown")
+async def encerrar():
+    await screenshot.pool.parar()
+
 def get_api_key() -> str:
     if not OPENAI_API_KEY:
         raise HTTPException(status_code=500, detail={"error": "OPENAI_API_KEY não configurada"})
@@ -95,14 +124,21 @@ def get_api_key() -> str:
 async def health():
     return {"status": "ok"}
 
+@app.get("/metricas")
+async def ler_metricas():
+    """Contadores do processo (ex.: chamadas executadas vs. coalescidas)."""
+    return metricas.instantaneo()
+
 @app.post("/session")
 async def create_session():
     logger.warning("O endpoint /session foi chamado, mas está obsoleto nesta configuração.")
     raise HTTPException(status_code=404, detail="Este endpoint não é usado na configuração de ligação direta.")
 
 @app.get("/webrtc", response_class=HTMLResponse)
-async def webrtc_page(request: Request):
-    client_id = str(uuid.uuid4())
+async def webrtc_page(request: Request, client_id: Optional[str] = None):
+    # O frontend pode fixar o client_id para depois ler a transcrição da sessão
+    if not client_id or not sessao.CLIENT_ID_RE.match(client_id):
+        client_id = str(uuid.uuid4())
     api_key_for_template = get_api_key()
     return templates.TemplateResponse(
         "webrtc.html",
@@ -0,0 +1,56 @@
+import os
+import time
+import numpy as np
+
+from routers.matches import MotorMatches, MODELOS, ACESSIBILIDADE, NIVEIS
+
+# --- BENCHMARK DO MOTOR DE MATCHES ---
+# Uso: python bench_matches.py  (ajuste o tamanho com BENCH_CANDIDATOS / BENCH_VAGAS)
+
+N_CANDIDATOS = int(os.getenv("BENCH_CANDIDATOS", "100000"))
+N_VAGAS = int(os.getenv("BENCH_VAGAS", "10000"))
+N_HABILIDADES = int(os.getenv("BENCH_HABILIDADES", "300"))
+K = 10
+
+rng = np.random.default_rng(42)
+habilidades = [f"habilidade-{i}" for i in range(N_HABILIDADES)]
+niveis = list(NIVEIS)
+
+
+def perfil_aleatorio(qtd_hab):
+    escolhidas = rng.choice(N_HABILIDADES, size=qtd_hab, replace=False)
+    return {
+        "habilidades": [habilidades[i] for i in escolhidas],
+        "nivel": niveis[rng.integers(len(niveis))],
+        "acessibilidade": [a for a in ACESSIBILIDADE if rng.random() < 0.25],
+    }
+
+
+def cronometrar(rotulo, fn):
+    inicio = time.perf_counter()
+    resultado = fn()
+    print(f"   - {rotulo}: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    return resultado
+
+
+print(f"--- Motor de matches: {N_CANDIDATOS} candidatos × {N_VAGAS} vagas, {N_HABILIDADES} habilidades ---")
+motor = MotorMatches()
+
+
+def carregar():
+    for i in range(N_VAGAS):
+        p = perfil_aleatorio(int(rng.integers(3, 9)))
+        motor.atualizar_vaga(f"v{i}", titulo=f"Vaga {i}", modelo=MODELOS[i % 3], **p)
+    for i in range(N_CANDIDATOS):
+        p = perfil_aleatorio(int(rng.integers(4, 13)))
+        motor.atualizar_candidato(f"c{i}", nome=f"Candidato {i}", modelos=[MODELOS[i % 3]], **p)
+
+
+cronometrar("carga incremental (um perfil por vez)", carregar)
+cronometrar(f"top-{K} vagas para um candidato", lambda: motor.top_vagas("c0", K))
+cronometrar(f"top-{K} candidatos para uma vaga", lambda: motor.top_candidatos("v0", K))
+cronometrar("atualizar um candidato", lambda: motor.atualizar_candidato("c0", habilidades=habilidades[:10], nivel="Sênior"))
+cronometrar(f"top-{K} vagas após a atualização", lambda: motor.top_vagas("c0", K))
+idx, _ = cronometrar(f"top-{K} vagas para TODOS os candidatos", lambda: motor.top_vagas_lote(K))
+print(f"     ({N_CANDIDATOS * N_VAGAS / 1e9:.1f} mil milhões de pares pontuados; resultado {idx.shape})")
+cronometrar(f"top-{K} candidatos para TODAS as vagas", lambda: motor.top_candidatos_lote(K))
@@ -0,0 +1,71 @@
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+import numpy as np
+
+from routers.vagas import IndiceVagas
+from routers.matches import ACESSIBILIDADE, MODELOS, NIVEIS
+
+# --- BENCHMARK DA BUSCA DE VAGAS ---
+# Uso: python bench_vagas.py  (gera o corpus sintético em BENCH_ARQUIVO se ainda não existir)
+
+N_VAGAS = int(os.getenv("BENCH_VAGAS", "1000000"))
+ARQUIVO = Path(os.getenv("BENCH_ARQUIVO", "dados/vagas_bench.jsonl"))
+REPETICOES = 20
+
+AREAS = ["Desenvolvimento", "QA", "Design", "Dados"]
+CARGOS = ["Desenvolvedor(a)", "Analista", "Engenheiro(a)", "Designer", "Cientista de Dados", "Testador(a)"]
+TECNOLOGIAS = ["Java", "Python", "React", "Angular", "SQL", "WAI-ARIA", "Playwright", "Figma", "TypeScript",
+               "Acessibilidade web", "Testes automatizados", "Power BI", "Docker", "Kotlin", "Node.js"]
+
+
+def gerar_corpus(caminho: Path, n: int):
+    rng = np.random.default_rng(7)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        for i in range(n):
+            tecnologias = list(rng.choice(TECNOLOGIAS, size=int(rng.integers(2, 6)), replace=False))
+            vaga = {
+                "id": f"vaga-{i}",
+                "titulo": f"{CARGOS[i % len(CARGOS)]} {tecnologias[0]} {list(NIVEIS)[i % 3]}",
+                "empresa": f"Empresa {i % 5000}",
+                "area": AREAS[int(rng.integers(len(AREAS)))],
+                "nivel": list(NIVEIS)[int(rng.integers(3))],
+                "modelo": MODELOS[int(rng.integers(3))],
+                "acessibilidade": [a for a in ACESSIBILIDADE if rng.random() < 0.4],
+                "requisitos": tecnologias,
+            }
+            f.write(json.dumps(vaga, ensure_ascii=False) + "\n")
+
+
+def cronometrar(rotulo, fn):
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        resultado = fn()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    print(f"   - {rotulo}: mediana {statistics.median(tempos):.2f} ms, máx {max(tempos):.2f} ms (total={resultado['total']})")
+    return resultado
+
+
+if not ARQUIVO.exists():
+    print(f"A gerar corpus sintético com {N_VAGAS} vagas em {ARQUIVO}...")
+    gerar_corpus(ARQUIVO, N_VAGAS)
+
+inicio = time.perf_counter()
+indice = IndiceVagas(ARQUIVO).carregar()
+print(f"--- Índice com {indice.n} vagas construído em {time.perf_counter() - inicio:.1f} s ---")
+
+cronometrar("sem filtros", lambda: indice.buscar())
+cronometrar("área + nível", lambda: indice.buscar(filtros={"area": ["Desenvolvimento"], "nivel": ["Pleno"]}))
+cronometrar("modelo OU + acessibilidade E", lambda: indice.buscar(
+    filtros={"modelo": ["Remoto", "Híbrido"], "acessibilidade": ["Leitor de tela", "Alto contraste"]}))
+cronometrar("texto 'react'", lambda: indice.buscar(q="react"))
+cronometrar("prefixo 'des'", lambda: indice.buscar(q="des"))
+cronometrar("texto + prefixo + facetas", lambda: indice.buscar(
+    q="python te", filtros={"area": ["Dados", "QA"], "acessibilidade": ["Navegação por voz"]}))
+pagina = indice.buscar(filtros={"area": ["QA"]}, limite=20)
+cronometrar("página seguinte (cursor)", lambda: indice.buscar(filtros={"area": ["QA"]}, limite=20,
+                                                              cursor=pagina["proximo_cursor"]))
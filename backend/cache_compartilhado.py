@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import metricas
+
+# Cache partilhado entre os workers do gunicorn (e entre reinícios) num ficheiro SQLite.
+CACHE_DB = Path(os.getenv("CACHE_DB", "cache/compartilhado.sqlite3"))
+# De quanto em quanto tempo uma escrita aproveita para apagar as entradas expiradas
+INTERVALO_LIMPEZA_S = float(os.getenv("CACHE_INTERVALO_LIMPEZA_S", "60"))
+
+
+class CacheCompartilhado:
+    """Chave/valor com TTL por namespace, seguro entre processos.
+
+    O SQLite em modo WAL permite leituras concorrentes e serializa as escritas com
+    o seu próprio lock de ficheiro; cada thread usa a sua conexão.
+    """
+
+    def __init__(self, caminho: Path = CACHE_DB):
+        self.caminho = caminho
+        self._local = threading.local()
+        self._proxima_limpeza = 0.0
+
+    def _conexao(self) -> sqlite3.Connection:
+        # Conexões não podem atravessar um fork: recria-as no processo filho
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.caminho, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " ns TEXT NOT NULL, chave TEXT NOT NULL, valor TEXT NOT NULL, expira REAL,"
+                " PRIMARY KEY (ns, chave))"
+            )
+            # Estado versionado: cada escrita recebe um seq global crescente, para que os
+            # outros workers reapliquem só o que mudou desde a última leitura
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS registro ("
+                " ns TEXT NOT NULL, chave TEXT NOT NULL, valor TEXT, seq INTEGER NOT NULL,"
+                " PRIMARY KEY (ns, chave))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS registro_seq ON registro (ns, seq)")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def obter(self, ns: str, chave: str) -> Optional[str]:
+        linha = self._conexao().execute(
+            "SELECT valor, expira FROM cache WHERE ns = ? AND chave = ?", (ns, chave)
+        ).fetchone()
+        if linha is None or (linha[1] is not None and linha[1] < time.time()):
+            metricas.incrementar(f"cache.{ns}.falhas")
+            if linha is not None:
+                self.remover(ns, chave)
+            return None
+        metricas.incrementar(f"cache.{ns}.acertos")
+        return linha[0]
+
+    def guardar(self, ns: str, chave: str, valor: str, ttl: Optional[float] = None) -> None:
+        expira = time.time() + ttl if ttl else None
+        self._conexao().execute(
+            "INSERT OR REPLACE INTO cache (ns, chave, valor, expira) VALUES (?, ?, ?, ?)",
+            (ns, chave, valor, expira),
+        )
+        agora = time.time()
+        if agora >= self._proxima_limpeza:
+            # Sem isto o ficheiro só cresce: cada worker limpa no máximo uma vez por intervalo
+            self._proxima_limpeza = agora + INTERVALO_LIMPEZA_S
+            removidas = self.limpar_expirados()
+            if removidas:
+                metricas.incrementar("cache.expiradas_removidas", removidas)
+
+    def remover(self, ns: str, chave: str) -> None:
+        self._conexao().execute("DELETE FROM cache WHERE ns = ? AND chave = ?", (ns, chave))
+
+    def registrar(self, ns: str, chave: str, valor: Optional[str]) -> int:
+        """Grava o estado atual de `chave` (None = removida) e devolve o seq atribuído."""
+        return self._conexao().execute(
+            "INSERT OR REPLACE INTO registro (ns, chave, valor, seq)"
+            " VALUES (?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM registro))"
+            " RETURNING seq",
+            (ns, chave, valor),
+        ).fetchall()[0][0]  # fetchall: o INSERT só termina (e liberta o lock) ao esgotar o cursor
+
+    def registros_desde(self, ns: str, seq: int) -> list[tuple[int, str, Optional[str]]]:
+        """Entradas de `ns` escritas depois de `seq`, em ordem: (seq, chave, valor)."""
+        return self._conexao().execute(
+            "SELECT seq, chave, valor FROM registro WHERE ns = ? AND seq > ? ORDER BY seq", (ns, seq)
+        ).fetchall()
+
+    def limpar_expirados(self) -> int:
+        return self._conexao().execute("DELETE FROM cache WHERE expira < ?", (time.time(),)).rowcount
+
+
+cache = CacheCompartilhado()
@@ -0,0 +1,65 @@
+import asyncio
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import metricas
+
+PORTAS_PADRAO = {"http": 80, "https": 443}
+
+
+def normalizar_url(url: str) -> str:
+    """Forma canónica de uma URL para usar como chave (host em minúsculas, sem fragmento, query ordenada)."""
+    partes = urlsplit(url.strip())
+    esquema = partes.scheme.lower()
+    host = (partes.hostname or "").lower()
+    if partes.port and partes.port != PORTAS_PADRAO.get(esquema):
+        host = f"{host}:{partes.port}"
+    query = urlencode(sorted(parse_qsl(partes.query, keep_blank_values=True)))
+    return urlunsplit((esquema, host, partes.path or "/", query, ""))
+
+
+def chave_hash(*partes: str | bytes) -> str:
+    """sha256 das partes (separadas), para chaves de textos ou imagens grandes."""
+    h = hashlib.sha256()
+    for parte in partes:
+        h.update(parte if isinstance(parte, bytes) else parte.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class SingleFlight:
+    """Junta chamadas idênticas simultâneas numa única execução.
+
+    Enquanto uma chamada com a mesma chave está em curso, as seguintes esperam por
+    ela e recebem o mesmo resultado (ou a mesma exceção). Nada fica em cache depois
+    de a chamada terminar. Os contadores `<nome>.executadas`, `<nome>.coalescidas`
+    e `<nome>.erros` vão para o módulo `metricas`.
+    """
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self._tarefas: dict[str, asyncio.Task] = {}
+
+    def _terminou(self, chave: str, tarefa: asyncio.Task) -> None:
+        if self._tarefas.get(chave) is tarefa:
+            del self._tarefas[chave]
+        # Marca a exceção como lida mesmo que todos os clientes tenham desistido
+        if not tarefa.cancelled() and tarefa.exception() is not None:
+            metricas.incrementar(f"{self.nome}.erros")
+
+    async def executar(self, chave: str, fabrica):
+        """`fabrica()` devolve o awaitable a executar.
+
+        Para trabalho bloqueante, a fábrica corre-o com `run_in_threadpool`: só a execução
+        ocupa uma thread, quem espera por ela fica no event loop.
+        """
+        tarefa = self._tarefas.get(chave)
+        if tarefa is None:
+            # A execução corre numa tarefa própria: se o primeiro cliente desligar, os outros não são cancelados
+            tarefa = asyncio.ensure_future(fabrica())
+            self._tarefas[chave] = tarefa
+            tarefa.add_done_callback(lambda t, c=chave: self._terminou(c, t))
+            metricas.incrementar(f"{self.nome}.executadas")
+        else:
+            metricas.incrementar(f"{self.nome}.coalescidas")
+        return await asyncio.shield(tarefa)
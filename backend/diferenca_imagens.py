@@ -0,0 +1,67 @@
+import numpy as np
+from PIL import Image
+
+# Deteção das regiões que mudaram entre duas capturas da mesma página.
+# As imagens são reduzidas e comparadas em blocos; os blocos alterados são agrupados
+# em faixas horizontais (o padrão típico de uma interface: um aviso, um passo do
+# formulário, uma lista que cresce), devolvidas em coordenadas da captura original.
+
+LARGURA_COMPARACAO = 256
+TAMANHO_BLOCO = 8
+LIMIAR_BLOCO = 6.0     # diferença média (0-255) a partir da qual um bloco conta como alterado
+FOLGA_BLOCOS = 2       # linhas de blocos sem mudança que ainda unem duas faixas
+MARGEM_PX = 16
+# Sem conteúdo numa das imagens (página cresceu ou encolheu): conta sempre como mudança
+_FORA = -255.0
+
+
+def _reduzir(img: Image.Image, escala: float) -> np.ndarray:
+    largura = max(1, round(img.width * escala))
+    altura = max(1, round(img.height * escala))
+    return np.asarray(img.convert("L").resize((largura, altura), Image.BILINEAR), dtype=np.float32)
+
+
+def blocos_alterados(anterior: Image.Image, atual: Image.Image) -> tuple[np.ndarray, float]:
+    """Máscara (linhas x colunas de blocos) das zonas alteradas e a escala usada na redução."""
+    escala = LARGURA_COMPARACAO / max(anterior.width, atual.width)
+    a, b = _reduzir(anterior, escala), _reduzir(atual, escala)
+    altura = -(-max(a.shape[0], b.shape[0]) // TAMANHO_BLOCO) * TAMANHO_BLOCO
+    largura = -(-max(a.shape[1], b.shape[1]) // TAMANHO_BLOCO) * TAMANHO_BLOCO
+    telas = np.full((2, altura, largura), _FORA, dtype=np.float32)
+    telas[0, : a.shape[0], : a.shape[1]] = a
+    telas[1, : b.shape[0], : b.shape[1]] = b
+    diferenca = np.abs(telas[0] - telas[1])
+    por_bloco = diferenca.reshape(
+        altura // TAMANHO_BLOCO, TAMANHO_BLOCO, largura // TAMANHO_BLOCO, TAMANHO_BLOCO
+    ).mean(axis=(1, 3))
+    return por_bloco > LIMIAR_BLOCO, escala
+
+
+def regioes_alteradas(anterior: Image.Image, atual: Image.Image) -> tuple[list[tuple[int, int, int, int]], float]:
+    """Caixas (x0, y0, x1, y1) das faixas alteradas e a fração de blocos alterados.
+
+    As duas capturas partilham a origem; as caixas podem passar dos limites de uma delas
+    (conteúdo que sumiu de uma página que encolheu, ou que apareceu numa que cresceu).
+    """
+    mascara, escala = blocos_alterados(anterior, atual)
+    linhas = np.flatnonzero(mascara.any(axis=1))
+    if len(linhas) == 0:
+        return [], 0.0
+    cortes = np.flatnonzero(np.diff(linhas) > FOLGA_BLOCOS + 1) + 1
+    px_por_bloco = TAMANHO_BLOCO / escala
+    regioes = []
+    for faixa in np.split(linhas, cortes):
+        colunas = np.flatnonzero(mascara[faixa[0] : faixa[-1] + 1].any(axis=0))
+        x0, x1 = colunas[0] * px_por_bloco - MARGEM_PX, (colunas[-1] + 1) * px_por_bloco + MARGEM_PX
+        y0, y1 = faixa[0] * px_por_bloco - MARGEM_PX, (faixa[-1] + 1) * px_por_bloco + MARGEM_PX
+        largura, altura = max(anterior.width, atual.width), max(anterior.height, atual.height)
+        caixa = (max(0, int(x0)), max(0, int(y0)), min(largura, int(x1)), min(altura, int(y1)))
+        if caixa[2] > caixa[0] and caixa[3] > caixa[1]:
+            regioes.append(caixa)
+    return regioes, float(mascara.mean())
+
+
+def dentro(caixa: tuple[int, int, int, int], img: Image.Image) -> tuple[int, int, int, int] | None:
+    """Parte da caixa que cai dentro da imagem, ou None se não houver nenhuma."""
+    x0, y0, x1, y1 = caixa[0], caixa[1], min(caixa[2], img.width), min(caixa[3], img.height)
+    return (x0, y0, x1, y1) if x1 > x0 and y1 > y0 else None
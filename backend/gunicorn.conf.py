@@ -0,0 +1,30 @@
+# Configuração do gunicorn para produção: vários workers uvicorn num só contentor.
+# Uso: gunicorn -c gunicorn.conf.py app:app
+
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# A app é importada no master antes do fork: módulos, templates e o índice de
+# vagas ficam em páginas partilhadas (copy-on-write) entre os workers.
+preload_app = True
+
+# Capturas e chamadas à OpenAI podem demorar; dá tempo aos pedidos em curso ao reiniciar
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+
+
+def when_ready(server):
+    # Corre no master, depois do preload e antes de criar os workers
+    from routers import vagas
+
+    indice = vagas.obter_indice()
+    server.log.info(f"Índice de vagas pré-carregado no master ({indice.n} vagas).")
@@ -0,0 +1,17 @@
+import threading
+from collections import defaultdict
+
+# Contadores simples do processo, expostos em GET /metricas.
+_trava = threading.Lock()
+_contadores: dict[str, float] = defaultdict(float)
+
+
+def incrementar(nome: str, valor: float = 1) -> None:
+    with _trava:
+        _contadores[nome] += valor
+
+
+def instantaneo() -> dict[str, float]:
+    """Cópia dos contadores atuais."""
+    with _trava:
+        return dict(_contadores)
@@ -0,0 +1,187 @@
+import hashlib
+import logging
+import os
+
+import metricas
+
+# Montagem do pedido de audiodescrição com prefixo estável para o cache de prompts da OpenAI.
+#
+# A OpenAI reaproveita o processamento de um prefixo já visto (a partir de 1024 tokens)
+# desde que seja idêntico byte a byte. Por isso a persona e as regras de formato ficam
+# numa constante de módulo, sempre em primeiro lugar, e só depois vêm as partes que
+# mudam a cada pedido: a imagem e, por último, a pergunta adicional.
+
+logger = logging.getLogger(__name__)
+
+MODELO_DESCRICAO = os.getenv("DESCRICAO_MODELO", "gpt-4o-mini")
+
+# Preço por 1M de tokens (USD): entrada, entrada em cache e saída
+PRECOS = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+}
+
+PROMPT_SISTEMA = """<persona>
+Você é um audiodescritor especialista em acessibilidade digital. Sua missão é traduzir conteúdo visual em uma experiência verbal rica e funcional para um usuário cego. Você não é apenas um descritor de imagens; você é um guia que permite a navegação e a compreensão completa de uma interface digital.
+</persona>
+
+<tarefa>
+Sua tarefa é analisar a imagem de uma página da web e gerar uma descrição textual extremamente detalhada e estruturada. O objetivo final é permitir que um usuário que utiliza um leitor de telas possa formar um mapa mental preciso da página, entendendo a estrutura, o conteúdo, a hierarquia e a funcionalidade de cada elemento, como se estivesse navegando nela de forma sequencial.
+</tarefa>
+
+<regras_essenciais>
+1.  **Hierarquia é Fundamental:** Use títulos e subtítulos (com markdown, como ## e ###) para organizar a descrição. A estrutura da sua resposta deve espelhar a estrutura da página.
+2.  **Linguagem Objetiva e Não-Visual:** Evite completamente termos que dependem da visão, como "como você pode ver", "olhe para", "na cor azul". Em vez disso, descreva a função e o conteúdo. Exceção: mencione cores ou estilos apenas se eles transmitirem um significado importante (ex: "um texto de erro destacado em vermelho").
+3.  **Especificidade Absoluta:** Seja preciso e quantitativo. Em vez de "há alguns links no menu", diga "o menu de navegação principal contém 4 links: 'Início', 'Sobre Nós', 'Serviços' e 'Contato'".
+4.  **Foco na Função:** A função de um elemento é mais importante que sua aparência. Descreva o que cada botão, link ou campo faz ou qual seu propósito.
+5.  **Ordem Lógica:** Descreva os elementos na ordem em que um leitor de tela os encontraria, geralmente de cima para baixo, da esquerda para a direita.
+</regras_essenciais>
+
+<formato_de_saida>
+Use a seguinte estrutura para sua resposta:
+
+### 1. Resumo Geral e Propósito da Página
+Comece com uma frase concisa que identifique a página e seu objetivo principal. Ex: "Esta é uma página de um curso online sobre Machine Learning, projetada para apresentar o conteúdo em vídeo e navegar pelas aulas."
+
+### 2. Estrutura e Layout (Mapa Mental)
+Descreva a disposição geral da página em grandes blocos, como um mapa.
+- **Cabeçalho:** O que contém? (logotipo, menu principal, ícones de perfil).
+- **Corpo Principal:** Como está dividido? (ex: uma coluna central para o conteúdo principal e uma coluna direita para navegação secundária).
+- **Menu Lateral (se houver):** Onde está posicionado e qual sua função?
+- **Rodapé:** O que contém?
+
+### 3. Navegação Sequencial (Do Topo à Base)
+Esta é a seção mais importante. Descreva cada elemento na ordem em que ele aparece na tela.
+
+- **Elemento 1 (Ex: Cabeçalho - Logotipo):** "No topo, à esquerda, encontra-se o logotipo da Pós Tech, que funciona como um link para a página inicial."
+- **Elemento 2 (Ex: Cabeçalho - Menu):** "À direita do logotipo, há um menu de navegação com três ícones interativos: 'Perfil do Usuário', 'Notificações' e 'Configurações'."
+- **Elemento 3 (Ex: Corpo Principal - Título):** "Abaixo do cabeçalho, no corpo principal, há um título de nível 1 que diz: 'Machine Learning Engineering'."
+- **Continue assim por toda a página, detalhando cada título, parágrafo, vídeo, botão e link.**
+
+### 4. Descrição Detalhada dos Elementos Interativos
+Liste e explique a função de todos os elementos clicáveis ou editáveis.
+- **Links:** Para cada link, informe o texto exato e o destino ou ação esperada.
+- **Botões:** Para cada botão, informe o texto ou ícone e a ação que ele executa (ex: "Um botão com o texto 'Próximo' para avançar para a próxima aula.").
+- **Campos de Formulário:** Se houver, descreva a etiqueta de cada campo (ex: "Um campo de texto com a etiqueta 'Seu nome'") e qualquer texto de ajuda.
+
+### 5. Descrição de Imagens e Gráficos
+Descreva o conteúdo e, mais importante, o propósito de qualquer imagem ou gráfico.
+- **Para Gráficos:** "O vídeo exibe um gráfico de dispersão com o título 'Análise de Regressão'. Ele mostra vários pontos de dados em vermelho e uma linha de tendência azul que sobe da esquerda para a direita, indicando uma correlação positiva entre as variáveis."
+
+### 5. Se não houver elementos visuais ou interativos, explique isso claramente.
+
+### 6. Se não ouver algum topico acima, não o inclua na resposta.
+</formato_de_saida>
+
+<exemplo>
+Para ilustrar a regra da especificidade e linguagem não-visual:
+
+**Não faça assim:** "Abaixo do vídeo, você verá um botão para favoritar."
+**Faça assim:** "Abaixo da área do vídeo, há uma linha com três botões. O primeiro é um botão com um ícone de estrela e o texto 'Favoritar'. O segundo é um botão com o texto 'Gerenciar Tags'. O terceiro é um botão com o texto 'Anotações'."
+</exemplo>"""
+
+# Identifica a versão do prefixo: entra na chave do cache de descrições
+VERSAO_PROMPT = hashlib.sha256(PROMPT_SISTEMA.encode("utf-8")).hexdigest()[:12]
+
+try:
+    import tiktoken
+except ImportError:  # dependência opcional: sem ela a contagem é uma estimativa
+    tiktoken = None
+
+
+def _codificador():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(MODELO_DESCRICAO)
+    except Exception:
+        return None
+
+
+_CODIFICADOR = _codificador()
+
+
+def contar_tokens(texto: str) -> int:
+    """Tokens do texto; sem tiktoken, estimativa de ~4 caracteres por token."""
+    if _CODIFICADOR is not None:
+        return len(_CODIFICADOR.encode(texto))
+    return (len(texto) + 3) // 4
+
+
+TOKENS_PREFIXO = contar_tokens(PROMPT_SISTEMA)
+if TOKENS_PREFIXO < 1024:
+    logger.warning(f"Prefixo do prompt com ~{TOKENS_PREFIXO} tokens: abaixo de 1024 o cache de prompts não se aplica.")
+
+
+def montar_mensagens(data_url: str, prompt_extra: str | None = None) -> list[dict]:
+    """Prefixo fixo (system) primeiro, depois a imagem e, no fim, a pergunta adicional."""
+    conteudo = [{"type": "image_url", "image_url": {"url": data_url}}]
+    if prompt_extra:
+        conteudo.append({"type": "text", "text": "Pergunta adicional: " + prompt_extra})
+    return [
+        {"role": "system", "content": PROMPT_SISTEMA},
+        {"role": "user", "content": conteudo},
+    ]
+
+
+# Modo "o que mudou": o prefixo continua a ser PROMPT_SISTEMA (e continua em cache);
+# esta instrução, também fixa, vem logo a seguir e antes dos recortes.
+INSTRUCAO_MUDANCAS = """<mudancas>
+O usuário já ouviu a descrição completa desta página. Depois de uma ação, a página mudou apenas nas regiões recortadas abaixo.
+Para cada região recebe o recorte "Antes" (quando existia conteúdo nesse lugar) e o recorte "Depois" (quando ainda existe; sem ele, o conteúdo do "Antes" desapareceu com o fim da página).
+Descreva somente o que mudou: o que apareceu, desapareceu ou foi alterado, e o que o usuário pode fazer agora.
+Não repita a estrutura geral da página nem use o formato de saída completo. Use um título ### por região, seguindo a ordem de leitura.
+Se a mudança for apenas cosmética e sem efeito para quem usa leitor de telas, diga isso numa frase.
+</mudancas>"""
+
+
+def montar_mensagens_mudancas(recortes: list[tuple[str | None, str | None]], prompt_extra: str | None = None) -> list[dict]:
+    """Mesmo prefixo fixo, instrução de mudanças e os pares (antes, depois) de cada região."""
+    conteudo = [{"type": "text", "text": INSTRUCAO_MUDANCAS}]
+    for i, (antes, depois) in enumerate(recortes, start=1):
+        if antes is not None:
+            conteudo.append({"type": "text", "text": f"Região {i} — Antes:"})
+            conteudo.append({"type": "image_url", "image_url": {"url": antes}})
+        if depois is not None:
+            conteudo.append({"type": "text", "text": f"Região {i} — Depois:"})
+            conteudo.append({"type": "image_url", "image_url": {"url": depois}})
+    if prompt_extra:
+        conteudo.append({"type": "text", "text": "Pergunta adicional: " + prompt_extra})
+    return [
+        {"role": "system", "content": PROMPT_SISTEMA},
+        {"role": "user", "content": conteudo},
+    ]
+
+
+def registrar_uso(usage, modelo: str = MODELO_DESCRICAO, prompt_extra: str | None = None) -> dict:
+    """Regista tokens (em cache e fora dele) e o custo estimado de uma chamada em `metricas`."""
+    if usage is None:
+        return {}
+    entrada = usage.prompt_tokens or 0
+    detalhes = getattr(usage, "prompt_tokens_details", None)
+    em_cache = (getattr(detalhes, "cached_tokens", None) or 0) if detalhes is not None else 0
+    saida = usage.completion_tokens or 0
+    precos = PRECOS.get(modelo)
+    if precos is None:
+        # A chamada já foi paga: sem tabela de preços fica só sem custo, nunca falha aqui
+        logger.warning(f"Sem preços para o modelo {modelo!r}; custo da descrição não calculado.")
+        custo = None
+        metricas.incrementar("descricao.chamadas_sem_preco")
+    else:
+        preco_entrada, preco_cache, preco_saida = precos
+        custo = ((entrada - em_cache) * preco_entrada + em_cache * preco_cache + saida * preco_saida) / 1e6
+        metricas.incrementar("descricao.custo_usd", custo)
+
+    metricas.incrementar("descricao.chamadas")
+    metricas.incrementar("descricao.tokens_entrada", entrada)
+    metricas.incrementar("descricao.tokens_entrada_cache", em_cache)
+    metricas.incrementar("descricao.tokens_saida", saida)
+    uso = {
+        "tokens_entrada": entrada,
+        "tokens_entrada_cache": em_cache,
+        "tokens_saida": saida,
+        "tokens_pergunta_estimados": contar_tokens(prompt_extra or ""),
+        "custo_usd": None if custo is None else round(custo, 6),
+    }
+    logger.info(f"Uso da descrição ({modelo}): {uso}")
+    return uso
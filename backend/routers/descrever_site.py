@@ -1,18 +1,42 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from openai import OpenAI
-from PIL import Image
+from PIL import Image, ImageChops
 import os
 import io
+import re
+import json
+import time
 import hashlib
 import base64
+import logging
 from dotenv import load_dotenv
 
+import metricas
+from cache_compartilhado import cache
+from coalescencia import SingleFlight, chave_hash, normalizar_url
+from diferenca_imagens import dentro, regioes_alteradas
+from prompt_descricao import MODELO_DESCRICAO, VERSAO_PROMPT, montar_mensagens, montar_mensagens_mudancas, registrar_uso
+
 # Carrega chave do .env
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY") or os.getenv("API_KEY"))
 
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/descrever", tags=["Descrição de Imagens"])
 
+# A mesma imagem com a mesma pergunta, pedida ao mesmo tempo, gera uma única chamada à API
+coalescer = SingleFlight("descricao")
+# A descrição depende só dos bytes da imagem e da pergunta: pode viver bastante tempo
+DESCRICAO_CACHE_TTL = int(os.getenv("DESCRICAO_CACHE_TTL", str(7 * 24 * 3600)))
+# Modo de mudanças: última captura descrita por (sessão, URL) e quando desistir do recorte
+QUADRO_ANTERIOR_TTL = int(os.getenv("DESCRICAO_QUADRO_TTL", "3600"))
+MAX_REGIOES_MUDANCAS = 4
+MAX_FRACAO_MUDANCAS = 0.5
+
 def preprocess_image_bytes(path, max_width=1024, jpeg_quality=75):
     """Redimensiona e retorna bytes da imagem otimizada + mime."""
     img = Image.open(path).convert("RGB")
@@ -30,99 +54,189 @@ def sha256_bytes(b: bytes) -> str:
     h.update(b)
     return h.hexdigest()
 
-def descrever_imagem_(caminho_imagem: str, prompt_extra: str | None = None) -> str:
+def preparar_imagem(caminho_imagem: str, prompt_extra: str | None = None) -> tuple[str, str]:
+    """Devolve a chave de cache da descrição e a imagem otimizada como data URL."""
     img_bytes, mime = preprocess_image_bytes(caminho_imagem, max_width=1024, jpeg_quality=75)
+    chave = chave_hash(sha256_bytes(img_bytes), prompt_extra or "", VERSAO_PROMPT)
+    data_url = f"data:{mime};base64,{base64.b64encode(img_bytes).decode('utf-8')}"
+    return chave, data_url
 
-    base_prompt = """
-    <persona>
-        Você é um audiodescritor especialista em acessibilidade digital. Sua missão é traduzir conteúdo visual em uma experiência verbal rica e funcional para um usuário cego. Você não é apenas um descritor de imagens; você é um guia que permite a navegação e a compreensão completa de uma interface digital.
-        </persona>
-
-        <tarefa>
-        Sua tarefa é analisar a imagem de uma página da web e gerar uma descrição textual extremamente detalhada e estruturada. O objetivo final é permitir que um usuário que utiliza um leitor de telas possa formar um mapa mental preciso da página, entendendo a estrutura, o conteúdo, a hierarquia e a funcionalidade de cada elemento, como se estivesse navegando nela de forma sequencial.
-        </tarefa>
-
-        <regras_essenciais>
-        1.  **Hierarquia é Fundamental:** Use títulos e subtítulos (com markdown, como ## e ###) para organizar a descrição. A estrutura da sua resposta deve espelhar a estrutura da página.
-        2.  **Linguagem Objetiva e Não-Visual:** Evite completamente termos que dependem da visão, como "como você pode ver", "olhe para", "na cor azul". Em vez disso, descreva a função e o conteúdo. Exceção: mencione cores ou estilos apenas se eles transmitirem um significado importante (ex: "um texto de erro destacado em vermelho").
-        3.  **Especificidade Absoluta:** Seja preciso e quantitativo. Em vez de "há alguns links no menu", diga "o menu de navegação principal contém 4 links: 'Início', 'Sobre Nós', 'Serviços' e 'Contato'".
-        4.  **Foco na Função:** A função de um elemento é mais importante que sua aparência. Descreva o que cada botão, link ou campo faz ou qual seu propósito.
-        5.  **Ordem Lógica:** Descreva os elementos na ordem em que um leitor de tela os encontraria, geralmente de cima para baixo, da esquerda para a direita.
-        </regras_essenciais>
-
-        <formato_de_saida>
-        Use a seguinte estrutura para sua resposta:
-
-        ### 1. Resumo Geral e Propósito da Página
-        Comece com uma frase concisa que identifique a página e seu objetivo principal. Ex: "Esta é uma página de um curso online sobre Machine Learning, projetada para apresentar o conteúdo em vídeo e navegar pelas aulas."
-
-        ### 2. Estrutura e Layout (Mapa Mental)
-        Descreva a disposição geral da página em grandes blocos, como um mapa.
-        - **Cabeçalho:** O que contém? (logotipo, menu principal, ícones de perfil).
-        - **Corpo Principal:** Como está dividido? (ex: uma coluna central para o conteúdo principal e uma coluna direita para navegação secundária).
-        - **Menu Lateral (se houver):** Onde está posicionado e qual sua função?
-        - **Rodapé:** O que contém?
-
-        ### 3. Navegação Sequencial (Do Topo à Base)
-        Esta é a seção mais importante. Descreva cada elemento na ordem em que ele aparece na tela.
-
-        - **Elemento 1 (Ex: Cabeçalho - Logotipo):** "No topo, à esquerda, encontra-se o logotipo da Pós Tech, que funciona como um link para a página inicial."
-        - **Elemento 2 (Ex: Cabeçalho - Menu):** "À direita do logotipo, há um menu de navegação com três ícones interativos: 'Perfil do Usuário', 'Notificações' e 'Configurações'."
-        - **Elemento 3 (Ex: Corpo Principal - Título):** "Abaixo do cabeçalho, no corpo principal, há um título de nível 1 que diz: 'Machine Learning Engineering'."
-        - **Continue assim por toda a página, detalhando cada título, parágrafo, vídeo, botão e link.**
-
-        ### 4. Descrição Detalhada dos Elementos Interativos
-        Liste e explique a função de todos os elementos clicáveis ou editáveis.
-        - **Links:** Para cada link, informe o texto exato e o destino ou ação esperada.
-        - **Botões:** Para cada botão, informe o texto ou ícone e a ação que ele executa (ex: "Um botão com o texto 'Próximo' para avançar para a próxima aula.").
-        - **Campos de Formulário:** Se houver, descreva a etiqueta de cada campo (ex: "Um campo de texto com a etiqueta 'Seu nome'") e qualquer texto de ajuda.
-
-        ### 5. Descrição de Imagens e Gráficos
-        Descreva o conteúdo e, mais importante, o propósito de qualquer imagem ou gráfico.
-        - **Para Gráficos:** "O vídeo exibe um gráfico de dispersão com o título 'Análise de Regressão'. Ele mostra vários pontos de dados em vermelho e uma linha de tendência azul que sobe da esquerda para a direita, indicando uma correlação positiva entre as variáveis."
-
-        ### 5. Se não houver elementos visuais ou interativos, explique isso claramente.
-
-        ### 6. Se não ouver algum topico acima, não o inclua na resposta.
-        </formato_de_saida>
-
-        <exemplo>
-        Para ilustrar a regra da especificidade e linguagem não-visual:
-
-        **Não faça assim:** "Abaixo do vídeo, você verá um botão para favoritar."
-        **Faça assim:** "Abaixo da área do vídeo, há uma linha com três botões. O primeiro é um botão com um ícone de estrela e o texto 'Favoritar'. O segundo é um botão com o texto 'Gerenciar Tags'. O terceiro é um botão com o texto 'Anotações'."
-        </exemplo>
-    """
-    if prompt_extra:
-        full_prompt = base_prompt + "\n\nPergunta adicional: " + prompt_extra
-    else:
-        full_prompt = base_prompt
+async def descrever_com_cache(chave: str, mensagens: list[dict], prompt_extra: str | None = None) -> str:
+    """Cache partilhado, depois uma única chamada à API por chave em curso."""
+    em_cache = await run_in_threadpool(cache.obter, "descricao", chave)
+    if em_cache is not None:
+        return em_cache
 
-    data_url = f"data:{mime};base64,{base64.b64encode(img_bytes).decode('utf-8')}"
+    def chamar_api() -> str:
+        try:
+            response = client.chat.completions.create(
+                model=MODELO_DESCRICAO,
+                messages=mensagens,
+                max_tokens=600,
+                temperature=0.0,
+            )
+            registrar_uso(response.usage, MODELO_DESCRICAO, prompt_extra)
+
+            descricao = response.choices[0].message.content
+            cache.guardar("descricao", chave, descricao, DESCRICAO_CACHE_TTL)
+            return descricao
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Erro ao chamar API: {e}")
+
+    # Só a chamada ocupa uma thread; pedidos iguais esperam por ela no event loop
+    return await coalescer.executar(chave, lambda: run_in_threadpool(chamar_api))
+
+async def descrever_imagem_(caminho_imagem: str, prompt_extra: str | None = None) -> str:
+    chave, data_url = await run_in_threadpool(preparar_imagem, caminho_imagem, prompt_extra)
+    return await descrever_com_cache(chave, montar_mensagens(data_url, prompt_extra), prompt_extra)
+
+def recorte_data_url(img: Image.Image, caixa: tuple[int, int, int, int], max_width=1024, jpeg_quality=75) -> str:
+    buf = io.BytesIO()
+    img.crop(caixa).save(buf, format="PNG")
+    dados, mime = preprocess_image_bytes(buf, max_width=max_width, jpeg_quality=jpeg_quality)
+    return f"data:{mime};base64,{base64.b64encode(dados).decode('utf-8')}"
+
+def recortar_mudancas(caminho_anterior: str, caminho_atual: str) -> tuple[dict, list[tuple[str | None, str | None]] | None]:
+    """Compara as capturas; devolve as regiões e os recortes (antes, depois), ou None se mudou quase tudo."""
+    anterior = Image.open(caminho_anterior).convert("RGB")
+    atual = Image.open(caminho_atual).convert("RGB")
+    regioes, fracao = regioes_alteradas(anterior, atual)
+    resposta = {"regioes": regioes, "fracao_alterada": round(fracao, 4)}
+    if len(regioes) > MAX_REGIOES_MUDANCAS or fracao > MAX_FRACAO_MUDANCAS:
+        return resposta, None
+
+    def recorte(img, caixa):
+        parte = dentro(caixa, img)
+        return recorte_data_url(img, parte) if parte else None
+
+    # Abaixo de `limite` só uma das capturas tem conteúdo: o que sumiu (página encolheu)
+    # vai só como "antes", o que apareceu (página cresceu) só como "depois"
+    limite = min(anterior.height, atual.height)
+    recortes = []
+    for x0, y0, x1, y1 in regioes:
+        comum = (x0, y0, x1, min(y1, limite))
+        antes, depois = dentro(comum, anterior), dentro(comum, atual)
+        # Acima de uma cauda a faixa comum pode ser só margem, igual nas duas: não mostra nada ao modelo
+        if y1 <= limite or (antes and depois and (
+            antes != depois or ImageChops.difference(anterior.crop(antes), atual.crop(depois)).getbbox()
+        )):
+            recortes.append((recorte(anterior, comum), recorte(atual, comum)))
+        if y1 > limite:
+            cauda = (x0, max(y0, limite), x1, y1)
+            recortes.append((recorte(anterior, cauda), recorte(atual, cauda)))
+    recortes = [par for par in recortes if par != (None, None)]
+    return resposta, recortes
+
+async def descrever_mudancas_(caminho_anterior: str, caminho_atual: str, prompt_extra: str | None = None) -> dict:
+    """Descreve só as regiões que mudaram entre duas capturas; recorre à descrição completa se mudou quase tudo."""
+    resposta, recortes = await run_in_threadpool(recortar_mudancas, caminho_anterior, caminho_atual)
+
+    if not resposta["regioes"]:
+        metricas.incrementar("descricao.mudancas.sem_mudancas")
+        return {**resposta, "modo": "sem_mudancas", "descricao": "A página não teve mudanças visíveis desde a última descrição."}
+    if recortes is None:
+        metricas.incrementar("descricao.mudancas.completas")
+        return {**resposta, "modo": "completo", "descricao": await descrever_imagem_(caminho_atual, prompt_extra)}
+
+    chave = chave_hash("mudancas", *(parte or "" for par in recortes for parte in par), prompt_extra or "", VERSAO_PROMPT)
+    metricas.incrementar("descricao.mudancas.parciais")
+    descricao = await descrever_com_cache(chave, montar_mensagens_mudancas(recortes, prompt_extra), prompt_extra)
+    return {**resposta, "modo": "mudancas", "descricao": descricao}
+
+SECAO_RE = re.compile(r"^#{1,6}\s+(.+?)\s*$")
+
+def _evento(tipo: str, **dados) -> bytes:
+    return (json.dumps({"tipo": tipo, **dados}, ensure_ascii=False) + "\n").encode("utf-8")
+
+class SeparadorSecoes:
+    """Acompanha o texto em streaming e indica os títulos markdown à medida que cada linha fecha."""
+
+    def __init__(self):
+        self.linha = ""
+        self.posicao = 0
+
+    def alimentar(self, delta: str) -> list[dict]:
+        secoes = []
+        for parte in delta.splitlines(keepends=True):
+            self.linha += parte
+            if self.linha.endswith("\n"):
+                secoes += self._fechar_linha()
+        return secoes
+
+    def terminar(self) -> list[dict]:
+        return self._fechar_linha() if self.linha else []
+
+    def _fechar_linha(self) -> list[dict]:
+        inicio, self.posicao = self.posicao, self.posicao + len(self.linha)
+        m = SECAO_RE.match(self.linha.strip())
+        self.linha = ""
+        return [{"titulo": m.group(1), "posicao": inicio}] if m else []
+
+def descrever_imagem_stream(chave: str, data_url: str, prompt_extra: str | None = None):
+    """Gera eventos NDJSON: `delta` com o texto, `secao` quando fecha um título, e `fim` (ou `erro`)."""
+    inicio = time.perf_counter()
+    separador = SeparadorSecoes()
+
+    em_cache = cache.obter("descricao", chave)
+    if em_cache is not None:
+        # Já descrita: entrega o texto de uma vez, com as mesmas marcas de secção
+        yield _evento("delta", texto=em_cache)
+        for secao in separador.alimentar(em_cache) + separador.terminar():
+            yield _evento("secao", **secao)
+        yield _evento("fim", cache=True, total_ms=round((time.perf_counter() - inicio) * 1000, 1))
+        return
+
+    partes = []
+    uso = None
+    ttft_ms = None
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": full_prompt},
-                        {"type": "image_url", "image_url": {"url": data_url}},
-                    ],
-                }
-            ],
+        stream = client.chat.completions.create(
+            model=MODELO_DESCRICAO,
+            messages=montar_mensagens(data_url, prompt_extra),
             max_tokens=600,
             temperature=0.0,
+            stream=True,
+            stream_options={"include_usage": True},
         )
-
-        descricao = response.choices[0].message.content
-        return descricao
+        try:
+            for chunk in stream:
+                if chunk.usage is not None:
+                    uso = chunk.usage
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - inicio) * 1000
+                    metricas.incrementar("descricao.stream.ttft_ms", ttft_ms)
+                    metricas.incrementar("descricao.stream.primeiros_tokens")
+                partes.append(delta)
+                yield _evento("delta", texto=delta)
+                for secao in separador.alimentar(delta):
+                    yield _evento("secao", **secao)
+        finally:
+            # Cliente desligou a meio (GeneratorExit) ou erro: fecha já a resposta da OpenAI
+            stream.close()
+        for secao in separador.terminar():
+            yield _evento("secao", **secao)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao chamar API: {e}")
+        logger.error(f"Erro no streaming da descrição: {e}", exc_info=True)
+        metricas.incrementar("descricao.stream.erros")
+        yield _evento("erro", detalhe=f"Erro ao chamar API: {e}")
+        return
 
-@router.post("/imagem")
-# Mude o nome do parâmetro para refletir que é apenas o nome do arquivo
-def descrever_imagem(nome_arquivo: str, prompt_extra: str | None = None):
+    descricao = "".join(partes)
+    cache.guardar("descricao", chave, descricao, DESCRICAO_CACHE_TTL)
+    total_ms = (time.perf_counter() - inicio) * 1000
+    logger.info(f"Descrição em streaming: primeiro token em {ttft_ms or 0:.0f} ms, total {total_ms:.0f} ms.")
+    yield _evento(
+        "fim",
+        cache=False,
+        ttft_ms=round(ttft_ms, 1) if ttft_ms is not None else None,
+        total_ms=round(total_ms, 1),
+        uso=registrar_uso(uso, MODELO_DESCRICAO, prompt_extra),
+    )
+
+def resolver_caminho(nome_arquivo: str) -> str:
     # Defina o diretório base DENTRO do container
     diretorio_base_container = "/app/screenshots_gerados"
     
@@ -136,8 +250,53 @@ def descrever_imagem(nome_arquivo: str, prompt_extra: str | None = None):
 
     if not os.path.exists(caminho_completo):
         raise HTTPException(status_code=404, detail="Arquivo não encontrado.")
+    return caminho_completo
+
+@router.post("/imagem")
+# Mude o nome do parâmetro para refletir que é apenas o nome do arquivo
+async def descrever_imagem(nome_arquivo: str, prompt_extra: str | None = None):
+    caminho_completo = resolver_caminho(nome_arquivo)
 
     # Chame a função interna com o caminho completo e correto
-    descricao = descrever_imagem_(caminho_completo, prompt_extra)
+    descricao = await descrever_imagem_(caminho_completo, prompt_extra)
     return {"descricao": descricao}
 
+@router.post("/imagem/stream")
+def descrever_imagem_em_streaming(nome_arquivo: str, prompt_extra: str | None = None):
+    """Mesma descrição, mas em NDJSON à medida que o modelo gera (leitor de ecrã/TTS começam mais cedo)."""
+    caminho_completo = resolver_caminho(nome_arquivo)
+    # Antes de abrir o stream: uma imagem ilegível ainda pode ser respondida com um erro HTTP
+    try:
+        chave, data_url = preparar_imagem(caminho_completo, prompt_extra)
+    except Exception as e:
+        logger.error(f"Erro ao preparar a imagem {nome_arquivo}: {e}", exc_info=True)
+        raise HTTPException(status_code=422, detail=f"Não foi possível ler a imagem: {e}")
+    return StreamingResponse(
+        descrever_imagem_stream(chave, data_url, prompt_extra),
+        media_type="application/x-ndjson",
+        # Sem buffering em proxies (ex.: nginx) para os eventos chegarem logo
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/imagem/mudancas")
+async def descrever_mudancas(nome_arquivo: str, sessao_id: str, url: str, prompt_extra: str | None = None):
+    """Descreve só o que mudou desde a última captura desta sessão para a mesma URL.
+
+    Na primeira captura (ou se a anterior já não existir) devolve a descrição completa.
+    """
+    caminho_completo = resolver_caminho(nome_arquivo)
+    chave_quadro = chave_hash(sessao_id, normalizar_url(url))
+    anterior = await run_in_threadpool(cache.obter, "quadro_anterior", chave_quadro)
+    try:
+        caminho_anterior = resolver_caminho(anterior) if anterior else None
+    except HTTPException:
+        caminho_anterior = None
+
+    inicio = time.perf_counter()
+    if caminho_anterior is None:
+        resposta = {"modo": "completo", "descricao": await descrever_imagem_(caminho_completo, prompt_extra), "regioes": []}
+    else:
+        resposta = await descrever_mudancas_(caminho_anterior, caminho_completo, prompt_extra)
+    await run_in_threadpool(cache.guardar, "quadro_anterior", chave_quadro, nome_arquivo, QUADRO_ANTERIOR_TTL)
+    resposta["tempo_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+    return resposta
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from openai import OpenAI, APIError
 from pydantic import BaseModel, Field
+from functools import lru_cache
+from typing import Optional
 import os
+import re
+import anyio
 from dotenv import load_dotenv
+import hashlib
 import logging
 import uuid
 from pathlib import Path
 
+from cache_compartilhado import cache
+from coalescencia import SingleFlight, chave_hash
+
 # Configura o logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -40,13 +49,74 @@ class TextCondition(BaseModel):
 class AudioRequest(BaseModel):
     conditions: list[TextCondition] = Field(..., min_length=1, max_length=1)
 
+# Pedidos simultâneos com o mesmo texto final fazem uma única chamada paga à API
+coalescer = SingleFlight("tts")
+TTS_MODELO = "gpt-4o-mini-tts"
+TTS_VOZ = "sage"
+
 # Define um diretório para armazenar os arquivos de áudio e o cria se não existir
 AUDIO_DIR = Path("audio_gerado")
 AUDIO_DIR.mkdir(exist_ok=True)
 
+# Variantes gravadas para cada áudio (cada formato extra é mais uma chamada à API).
+# O mp3 é sempre gerado: é o que todos os navegadores tocam.
+FORMATOS_AUDIO = {"mp3": "audio/mpeg", "opus": "audio/ogg"}
+TTS_FORMATOS = ["mp3"] + [f for f in os.getenv("TTS_FORMATOS", "mp3").split(",") if f in FORMATOS_AUDIO and f != "mp3"]
+NOME_AUDIO_RE = re.compile(r"^[A-Za-z0-9-]{1,64}$")
+TAMANHO_BLOCO_AUDIO = 64 * 1024
+
+
+def sintetizar_para_arquivo(texto_final: str, prompt_oculto: str) -> Path:
+    """Chama a API de TTS e grava o áudio num ficheiro novo em AUDIO_DIR."""
+    logger.info("Chamando a API da OpenAI para gerar o áudio...")
+    resposta = client.audio.speech.create(
+        model=TTS_MODELO,
+        voice=TTS_VOZ,
+        input=texto_final,
+        instructions=prompt_oculto,
+    )
+    logger.info("Áudio gerado com sucesso pela API.")
+
+    # Gera um nome de arquivo único e define o caminho completo
+    file_name = f"{uuid.uuid4()}.mp3"
+    file_path = AUDIO_DIR / file_name
+
+    logger.info(f"Salvando o áudio em: {file_path}")
+    # Salva o stream de áudio diretamente no arquivo de forma eficiente
+    resposta.stream_to_file(file_path)
+    logger.info(f"Arquivo de áudio salvo com sucesso em '{file_path}'.")
+
+    for formato in TTS_FORMATOS[1:]:
+        # Mesmo nome, outra extensão: a rota de áudio escolhe pela negociação de Accept
+        client.audio.speech.create(
+            model=TTS_MODELO,
+            voice=TTS_VOZ,
+            input=texto_final,
+            instructions=prompt_oculto,
+            response_format=formato,
+        ).stream_to_file(file_path.with_suffix(f".{formato}"))
+        logger.info(f"Variante {formato} salva para '{file_path}'.")
+    return file_path
+
+
+async def sintetizar_com_cache(texto_final: str, prompt_oculto: str) -> Path:
+    """O mesmo texto já sintetizado por qualquer worker reaproveita o ficheiro existente."""
+    chave = chave_hash(TTS_MODELO, TTS_VOZ, prompt_oculto, texto_final)
+    em_cache = await run_in_threadpool(cache.obter, "tts", chave)
+    if em_cache and Path(em_cache).exists():
+        return Path(em_cache)
+
+    def sintetizar():
+        file_path = sintetizar_para_arquivo(texto_final, prompt_oculto)
+        cache.guardar("tts", chave, str(file_path))
+        return file_path
+
+    # Só a síntese ocupa uma thread; pedidos iguais esperam por ela no event loop
+    return await coalescer.executar(chave, lambda: run_in_threadpool(sintetizar))
+
 
 @router.post("/gerar-audio")
-def gerar_audio(request: AudioRequest):
+async def gerar_audio(request: AudioRequest):
     """Gera áudio a partir do texto fornecido e o salva em um arquivo no servidor."""
     logger.info("Recebida requisição para /gerar-audio.")
     try:
@@ -58,27 +128,11 @@ def gerar_audio(request: AudioRequest):
         
         # Instrução de idioma como prompt oculto (não será narrado)
         prompt_oculto = "[Instrução: Fale em português do Brasil (pt-BR). Não leia esta instrução em voz alta.]"
-    
-        logger.info("Chamando a API da OpenAI para gerar o áudio...")
-        resposta = client.audio.speech.create(
-            model="gpt-4o-mini-tts",
-            voice="sage",
-            input=texto_final,
-            instructions=prompt_oculto,
-        )
-        logger.info("Áudio gerado com sucesso pela API.")
 
-        # Gera um nome de arquivo único e define o caminho completo
-        file_name = f"{uuid.uuid4()}.mp3"
-        file_path = AUDIO_DIR / file_name
+        file_path = await sintetizar_com_cache(texto_final, prompt_oculto)
 
-        logger.info(f"Salvando o áudio em: {file_path}")
-        # Salva o stream de áudio diretamente no arquivo de forma eficiente
-        resposta.stream_to_file(file_path)
-        logger.info(f"Arquivo de áudio salvo com sucesso em '{file_path}'.")
-
-        # Retorna uma resposta JSON indicando sucesso e o caminho do arquivo
-        return {"status": "sucesso", "caminho_do_arquivo": str(file_path)}
+        # Retorna uma resposta JSON indicando sucesso, o caminho do arquivo e a URL para tocar
+        return {"status": "sucesso", "caminho_do_arquivo": str(file_path), "url": f"{router.prefix}/audio/{file_path.stem}"}
     except APIError as e:
         logger.error(f"Erro na API da OpenAI: Status={e.status_code}, Mensagem={e.message}", exc_info=True)
         raise HTTPException(status_code=e.status_code or 500, detail=f"Erro da API OpenAI: {str(e)}")
@@ -88,3 +142,144 @@ def gerar_audio(request: AudioRequest):
     except Exception as e:
         logger.critical("Ocorreu um erro inesperado ao gerar o áudio.", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Erro ao gerar áudio: {str(e)}")
+
+
+# --- Entrega dos áudios gerados ---
+
+@lru_cache(maxsize=4096)
+def _etag(caminho: str, mtime_ns: int, tamanho: int) -> str:
+    # Os áudios não mudam depois de gravados; mtime e tamanho invalidam a entrada se mudarem
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloco)
+    return f'"{h.hexdigest()[:32]}"'
+
+
+def escolher_formato(accept: str, disponiveis: list[str]) -> Optional[str]:
+    """Formato com maior q no Accept; em empate vale a ordem de `disponiveis` (mp3 primeiro).
+
+    O q de cada formato vem do intervalo mais específico que o casa.
+    """
+    preferencias = []
+    for item in (accept or "*/*").split(","):
+        partes = [p.strip() for p in item.split(";")]
+        q = 1.0
+        for parametro in partes[1:]:
+            if parametro.startswith("q="):
+                try:
+                    q = float(parametro[2:])
+                except ValueError:
+                    q = 0.0
+        preferencias.append((partes[0].lower(), q))
+
+    def qualidade(formato: str) -> float:
+        # RFC 9110 §12.5.1: vale o intervalo mais específico que casa (tipo exato, depois
+        # audio/*, depois */*), então `audio/mpeg;q=0, */*` recusa mp3
+        exatos = {FORMATOS_AUDIO[formato]} | ({"audio/opus"} if formato == "opus" else set())
+        for aceites in (exatos, {"audio/*"}, {"*/*"}):
+            valores = [q for t, q in preferencias if t in aceites]
+            if valores:
+                return max(valores)
+        return 0.0
+
+    melhor = max(disponiveis, key=qualidade, default=None)
+    return melhor if melhor is not None and qualidade(melhor) > 0 else None
+
+
+def intervalo_pedido(cabecalho: str, tamanho: int) -> Optional[tuple[int, int]]:
+    """(início, fim inclusivo) de um Range `bytes=início-fim` simples; None se não for satisfazível."""
+    inicio, _, fim = cabecalho.partition("=")[2].strip().partition("-")
+    try:
+        if inicio == "":
+            sufixo = int(fim)
+            if sufixo <= 0:
+                return None
+            return (max(0, tamanho - sufixo), tamanho - 1)
+        inicio = int(inicio)
+        fim = min(int(fim), tamanho - 1) if fim else tamanho - 1
+    except ValueError:
+        return None
+    if inicio >= tamanho or fim < inicio:
+        return None
+    return (inicio, fim)
+
+
+class RespostaArquivo(Response):
+    """Envia um trecho de um ficheiro: zero-copy (sendfile) se o servidor ASGI o oferecer, senão por blocos."""
+
+    def __init__(self, caminho: Path, inicio: int, tamanho: int, status_code: int, headers: dict, media_type: str, corpo: bool = True):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.caminho = caminho
+        self.inicio = inicio
+        self.tamanho = tamanho
+        self.corpo = corpo
+        self.headers["content-length"] = str(tamanho)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.corpo or self.tamanho == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.caminho, "rb") as f:
+                await send({"type": "http.response.zerocopysend", "file": f.fileno(), "offset": self.inicio, "count": self.tamanho})
+            return
+        async with await anyio.open_file(self.caminho, "rb") as f:
+            await f.seek(self.inicio)
+            restante = self.tamanho
+            while restante > 0:
+                bloco = await f.read(min(TAMANHO_BLOCO_AUDIO, restante))
+                if not bloco:
+                    break
+                restante -= len(bloco)
+                await send({"type": "http.response.body", "body": bloco, "more_body": restante > 0})
+            if restante > 0:
+                await send({"type": "http.response.body", "body": b""})
+
+
+@router.api_route("/audio/{nome}", methods=["GET", "HEAD"])
+def servir_audio(nome: str, request: Request, formato: Optional[str] = None):
+    """Serve um áudio gerado com Range, ETag forte, cache imutável e escolha mp3/opus pelo Accept."""
+    if not NOME_AUDIO_RE.match(nome):
+        raise HTTPException(status_code=400, detail="Nome de áudio inválido.")
+    disponiveis = [f for f in FORMATOS_AUDIO if (AUDIO_DIR / f"{nome}.{f}").is_file()]
+    if not disponiveis:
+        raise HTTPException(status_code=404, detail="Áudio não encontrado.")
+    if formato is not None:
+        if formato not in disponiveis:
+            raise HTTPException(status_code=404, detail=f"Formato {formato} não disponível para este áudio.")
+        escolhido = formato
+    else:
+        escolhido = escolher_formato(request.headers.get("accept"), disponiveis)
+        if escolhido is None:
+            raise HTTPException(status_code=406, detail=f"Formatos disponíveis: {', '.join(FORMATOS_AUDIO[f] for f in disponiveis)}.")
+
+    caminho = AUDIO_DIR / f"{nome}.{escolhido}"
+    info = caminho.stat()
+    etag = _etag(str(caminho), info.st_mtime_ns, info.st_size)
+    cabecalhos = {
+        "etag": etag,
+        "cache-control": "public, max-age=31536000, immutable",
+        "accept-ranges": "bytes",
+        "vary": "Accept",
+    }
+    if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=cabecalhos)
+
+    tamanho = info.st_size
+    inicio, fim, status = 0, tamanho - 1, 200
+    faixa = request.headers.get("range", "")
+    # Vários intervalos (multipart) não são suportados e, como outras unidades, são ignorados;
+    # If-Range com outra ETag indica outra versão, então o cliente recebe o ficheiro todo.
+    if faixa.startswith("bytes=") and "," not in faixa and request.headers.get("if-range", etag) == etag:
+        intervalo = intervalo_pedido(faixa, tamanho)
+        if intervalo is None:
+            return Response(status_code=416, headers={**cabecalhos, "content-range": f"bytes */{tamanho}"})
+        inicio, fim = intervalo
+        status = 206
+        cabecalhos["content-range"] = f"bytes {inicio}-{fim}/{tamanho}"
+    return RespostaArquivo(
+        caminho, inicio, fim - inicio + 1, status, cabecalhos, FORMATOS_AUDIO[escolhido],
+        corpo=request.method != "HEAD",
+    )
@@ -0,0 +1,522 @@
+# app/routers/matches.py
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+import numpy as np
+import json
+import os
+import threading
+import logging
+
+import metricas
+from cache_compartilhado import cache
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/matches", tags=["Matches"])
+
+NIVEIS = {"Júnior": 0, "Pleno": 1, "Sênior": 2}
+MODELOS = ["Remoto", "Híbrido", "Presencial"]
+ACESSIBILIDADE = ["Leitor de tela", "Alto contraste", "Navegação por voz", "Subtítulos automáticos"]
+
+# Teto de colunas de habilidades (cada uma ocupa uma coluna densa em candidatos e vagas)
+MAX_HABILIDADES = int(os.getenv("MATCHES_MAX_HABILIDADES", "2048"))
+
+# Peso de cada componente na compatibilidade final (soma 1.0)
+PESOS = {"habilidades": 0.6, "nivel": 0.15, "modelo": 0.15, "acessibilidade": 0.10}
+
+Nivel = Literal["Júnior", "Pleno", "Sênior"]
+Modelo = Literal["Remoto", "Híbrido", "Presencial"]
+
+
+def normalizar_habilidade(nome: str) -> str:
+    return " ".join(nome.strip().lower().split())
+
+
+class _Perfis:
+    """Perfis de um lado do match guardados em matrizes densas com capacidade crescente.
+
+    Cada perfil ocupa uma linha; as colunas de `hab` são as habilidades do vocabulário
+    global. Atualizar um perfil reescreve só a linha dele.
+    """
+
+    def __init__(self, dtype_hab, capacidade: int = 1024, n_hab: int = 64):
+        self.dtype_hab = dtype_hab
+        self.ids: list[Optional[str]] = []
+        self.rotulos: list[Optional[str]] = []
+        self.linha_por_id: dict[str, int] = {}
+        self.livres: list[int] = []
+        self.hab = np.zeros((capacidade, n_hab), dtype=dtype_hab)
+        self.qtd_hab = np.zeros(capacidade, dtype=np.float32)
+        self.nivel = np.full(capacidade, -1.0, dtype=np.float32)
+        self.modelo = np.zeros((capacidade, len(MODELOS)), dtype=np.float32)
+        self.acess = np.zeros((capacidade, len(ACESSIBILIDADE)), dtype=np.float32)
+        self.qtd_acess = np.zeros(capacidade, dtype=np.float32)
+        self.ativo = np.zeros(capacidade, dtype=bool)
+
+    @property
+    def n(self) -> int:
+        return len(self.ids)
+
+    def _crescer_linhas(self):
+        nova = self.hab.shape[0] * 2
+        for nome in ("hab", "qtd_hab", "nivel", "modelo", "acess", "qtd_acess", "ativo"):
+            atual = getattr(self, nome)
+            maior = np.zeros((nova,) + atual.shape[1:], dtype=atual.dtype)
+            if nome == "nivel":
+                maior[:] = -1.0
+            maior[: atual.shape[0]] = atual
+            setattr(self, nome, maior)
+
+    def garantir_colunas(self, n_hab: int, maximo: int = MAX_HABILIDADES):
+        if n_hab <= self.hab.shape[1]:
+            return
+        nova = max(n_hab, min(self.hab.shape[1] * 2, maximo))
+        maior = np.zeros((self.hab.shape[0], nova), dtype=self.dtype_hab)
+        maior[:, : self.hab.shape[1]] = self.hab
+        self.hab = maior
+
+    def linha_para(self, perfil_id: str) -> int:
+        linha = self.linha_por_id.get(perfil_id)
+        if linha is not None:
+            return linha
+        if self.livres:
+            linha = self.livres.pop()
+            self.ids[linha] = perfil_id
+            self.rotulos[linha] = None
+        else:
+            linha = self.n
+            if linha >= self.hab.shape[0]:
+                self._crescer_linhas()
+            self.ids.append(perfil_id)
+            self.rotulos.append(None)
+        self.linha_por_id[perfil_id] = linha
+        return linha
+
+    def escrever(self, linha: int, rotulo, colunas_hab, nivel, modelos, acessibilidade):
+        self.rotulos[linha] = rotulo
+        self.hab[linha] = 0
+        self.hab[linha, colunas_hab] = 1
+        self.qtd_hab[linha] = len(colunas_hab)
+        self.nivel[linha] = NIVEIS[nivel] if nivel else -1.0
+        self.modelo[linha] = 0
+        self.modelo[linha, [MODELOS.index(m) for m in modelos]] = 1
+        self.acess[linha] = 0
+        self.acess[linha, [ACESSIBILIDADE.index(a) for a in acessibilidade]] = 1
+        self.qtd_acess[linha] = len(acessibilidade)
+        self.ativo[linha] = True
+
+    def remover(self, perfil_id: str) -> bool:
+        linha = self.linha_por_id.pop(perfil_id, None)
+        if linha is None:
+            return False
+        self.ativo[linha] = False
+        self.hab[linha] = 0
+        self.ids[linha] = None
+        self.livres.append(linha)
+        return True
+
+
+def _top_k(pontuacoes: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Top-k por linha (índices e pontuações em ordem decrescente)."""
+    k = min(k, pontuacoes.shape[1])
+    if k == 0:
+        vazio = np.zeros((pontuacoes.shape[0], 0))
+        return vazio.astype(np.int64), vazio.astype(np.float32)
+    idx = np.argpartition(-pontuacoes, k - 1, axis=1)[:, :k]
+    valores = np.take_along_axis(pontuacoes, idx, axis=1)
+    ordem = np.argsort(-valores, axis=1)
+    return np.take_along_axis(idx, ordem, axis=1), np.take_along_axis(valores, ordem, axis=1)
+
+
+class MotorMatches:
+    """Pontua todos os pares candidato×vaga com um produto matricial por bloco de candidatos.
+
+    - habilidades: fração dos requisitos da vaga que o candidato cobre (produto matricial);
+    - nível: 1 - |diferença de senioridade| / 2;
+    - modelo de trabalho: 1 se alguma preferência do candidato coincide com a vaga;
+    - acessibilidade: fração das necessidades do candidato que a vaga atende.
+    Perfis sem informação num componente recebem pontuação máxima nesse componente.
+
+    Só habilidades pedidas por alguma vaga ocupam coluna (as outras nunca pontuam), até
+    `max_habilidades`. As habilidades de um candidato sem coluna ficam à parte e ganham
+    coluna quando uma vaga passa a pedi-las; a coluna é libertada quando a última vaga
+    que a usa muda ou sai.
+    """
+
+    def __init__(self, bloco: int = 1024, max_habilidades: int = MAX_HABILIDADES):
+        self.bloco = bloco
+        self.max_habilidades = max_habilidades
+        self.vocabulario: dict[str, int] = {}
+        self.nomes_habilidades: list[Optional[str]] = []
+        self.colunas_livres: list[int] = []
+        self.vagas_por_coluna = np.zeros(0, dtype=np.int64)
+        # Habilidades (normalizadas) de candidatos que ainda não têm coluna, nos dois sentidos
+        self.pendentes: dict[str, set[str]] = {}
+        self.pendentes_candidato: dict[str, set[str]] = {}
+        # Candidatos em uint8 (memória); vagas em float32 (entram direto no produto matricial)
+        self.candidatos = _Perfis(np.uint8)
+        self.vagas = _Perfis(np.float32)
+        self._trava = threading.RLock()
+        self._versao_vagas = 0
+        self._cache_pesos = None
+
+    # --- atualização incremental ---
+
+    def _habilidades(self, habilidades) -> dict[str, str]:
+        """Nome normalizado -> nome como veio, sem vazias nem repetidas."""
+        nomes = {}
+        for nome in habilidades:
+            chave = normalizar_habilidade(nome)
+            if chave:
+                nomes.setdefault(chave, nome.strip())
+        return nomes
+
+    def _criar_coluna(self, chave: str, nome: str) -> Optional[int]:
+        if self.colunas_livres:
+            col = self.colunas_livres.pop()
+            self.nomes_habilidades[col] = nome
+        elif len(self.nomes_habilidades) < self.max_habilidades:
+            col = len(self.nomes_habilidades)
+            self.nomes_habilidades.append(nome)
+            self.candidatos.garantir_colunas(col + 1, self.max_habilidades)
+            self.vagas.garantir_colunas(col + 1, self.max_habilidades)
+            if col >= len(self.vagas_por_coluna):
+                maior = np.zeros(max(col + 1, 2 * len(self.vagas_por_coluna)), dtype=np.int64)
+                maior[: len(self.vagas_por_coluna)] = self.vagas_por_coluna
+                self.vagas_por_coluna = maior
+        else:
+            return None
+        self.vocabulario[chave] = col
+        # Candidatos que já tinham a habilidade passam a pontuar nela
+        for candidato_id in self.pendentes.pop(chave, ()):
+            self.candidatos.hab[self.candidatos.linha_por_id[candidato_id], col] = 1
+            restantes = self.pendentes_candidato[candidato_id]
+            restantes.discard(chave)
+            if not restantes:
+                del self.pendentes_candidato[candidato_id]
+        return col
+
+    def _libertar_coluna(self, col: int):
+        chave = normalizar_habilidade(self.nomes_habilidades[col])
+        for linha in np.flatnonzero(self.candidatos.hab[: self.candidatos.n, col]):
+            candidato_id = self.candidatos.ids[linha]
+            self.pendentes.setdefault(chave, set()).add(candidato_id)
+            self.pendentes_candidato.setdefault(candidato_id, set()).add(chave)
+        self.candidatos.hab[:, col] = 0
+        self.vagas.hab[:, col] = 0
+        del self.vocabulario[chave]
+        self.nomes_habilidades[col] = None
+        self.colunas_livres.append(col)
+
+    def _esquecer_pendentes(self, candidato_id: str):
+        for chave in self.pendentes_candidato.pop(candidato_id, ()):
+            ids = self.pendentes[chave]
+            ids.discard(candidato_id)
+            if not ids:
+                del self.pendentes[chave]
+
+    def _colunas_da_vaga(self, linha: int) -> np.ndarray:
+        return np.flatnonzero(self.vagas.hab[linha, : len(self.nomes_habilidades)])
+
+    def atualizar_candidato(self, candidato_id: str, nome=None, habilidades=(), nivel=None, modelos=(), acessibilidade=()):
+        with self._trava:
+            nomes = self._habilidades(habilidades)
+            colunas = sorted(self.vocabulario[c] for c in nomes if c in self.vocabulario)
+            linha = self.candidatos.linha_para(candidato_id)
+            self._esquecer_pendentes(candidato_id)
+            sem_coluna = {c for c in nomes if c not in self.vocabulario}
+            if sem_coluna:
+                self.pendentes_candidato[candidato_id] = sem_coluna
+                for chave in sem_coluna:
+                    self.pendentes.setdefault(chave, set()).add(candidato_id)
+            self.candidatos.escrever(linha, nome, colunas, nivel, list(modelos), list(acessibilidade))
+
+    def atualizar_vaga(self, vaga_id: str, titulo=None, habilidades=(), nivel=None, modelo=None, acessibilidade=()):
+        with self._trava:
+            existia = vaga_id in self.vagas.linha_por_id
+            linha = self.vagas.linha_para(vaga_id)
+            antigas = self._colunas_da_vaga(linha) if existia else np.zeros(0, dtype=np.int64)
+            colunas, descartadas = [], 0
+            for chave, nome in self._habilidades(habilidades).items():
+                col = self.vocabulario.get(chave)
+                if col is None:
+                    col = self._criar_coluna(chave, nome)
+                if col is None:
+                    descartadas += 1
+                else:
+                    colunas.append(col)
+            if descartadas:
+                logger.warning(f"Vocabulário de habilidades cheio ({self.max_habilidades}): {descartadas} ignorada(s) na vaga {vaga_id}.")
+                metricas.incrementar("matches.habilidades_descartadas", descartadas)
+            self.vagas_por_coluna[antigas] -= 1
+            self.vagas_por_coluna[colunas] += 1
+            self.vagas.escrever(linha, titulo, sorted(colunas), nivel, [modelo] if modelo else [], list(acessibilidade))
+            for col in antigas[self.vagas_por_coluna[antigas] == 0]:
+                self._libertar_coluna(int(col))
+            self._versao_vagas += 1
+
+    def remover_candidato(self, candidato_id: str) -> bool:
+        with self._trava:
+            self._esquecer_pendentes(candidato_id)
+            return self.candidatos.remover(candidato_id)
+
+    def remover_vaga(self, vaga_id: str) -> bool:
+        with self._trava:
+            linha = self.vagas.linha_por_id.get(vaga_id)
+            if linha is None:
+                return False
+            antigas = self._colunas_da_vaga(linha)
+            self.vagas.remover(vaga_id)
+            self.vagas_por_coluna[antigas] -= 1
+            for col in antigas[self.vagas_por_coluna[antigas] == 0]:
+                self._libertar_coluna(int(col))
+            self._versao_vagas += 1
+            return True
+
+    # --- pontuação ---
+
+    # Colunas extras (além das habilidades) das matrizes de características:
+    # nível one-hot + desconhecido, modelo + desconhecido, acessibilidade + sem necessidades, viés.
+    N_EXTRAS = (len(NIVEIS) + 1) + (len(MODELOS) + 1) + (len(ACESSIBILIDADE) + 1) + 1
+
+    def _caracteristicas_candidatos(self, c) -> np.ndarray:
+        """Matriz (candidatos × características) do lado esquerdo do produto."""
+        C = self.candidatos
+        n_hab = len(self.nomes_habilidades)
+        nivel, modelo, qtd_acess = C.nivel[c], C.modelo[c], C.qtd_acess[c]
+        X = np.empty((len(nivel), n_hab + self.N_EXTRAS), dtype=np.float32)
+        X[:, :n_hab] = C.hab[c, :n_hab]
+        o = n_hab
+        X[:, o : o + len(NIVEIS)] = nivel[:, None] == np.arange(len(NIVEIS))
+        X[:, o + len(NIVEIS)] = nivel < 0
+        o += len(NIVEIS) + 1
+        X[:, o : o + len(MODELOS)] = modelo
+        X[:, o + len(MODELOS)] = modelo.sum(axis=1) == 0
+        o += len(MODELOS) + 1
+        X[:, o : o + len(ACESSIBILIDADE)] = C.acess[c] / np.maximum(qtd_acess, 1)[:, None]
+        X[:, o + len(ACESSIBILIDADE)] = qtd_acess == 0
+        X[:, -1] = 1.0
+        return X
+
+    def _pesos_vagas(self, v) -> np.ndarray:
+        """Matriz (características × vagas) do lado direito, já com os pesos de cada componente.
+
+        Com ela a compatibilidade de um bloco inteiro sai de um único produto matricial:
+        cada componente vira um termo linear e os casos "sem informação" entram pela
+        coluna de viés. Vagas inativas ficam com pontuação -1.
+        """
+        V = self.vagas
+        n_hab = len(self.nomes_habilidades)
+        nivel, modelo, qtd_hab, ativo = V.nivel[v], V.modelo[v], V.qtd_hab[v], V.ativo[v]
+        nivel_conhecido = nivel >= 0
+        modelo_conhecido = modelo.sum(axis=1) > 0
+        W = np.empty((n_hab + self.N_EXTRAS, len(nivel)), dtype=np.float32)
+        W[:n_hab] = (V.hab[v, :n_hab] * (PESOS["habilidades"] / np.maximum(qtd_hab, 1))[:, None]).T
+        o = n_hab
+        proximidade = 1.0 - np.abs(np.arange(len(NIVEIS))[:, None] - nivel[None, :]) / 2
+        W[o : o + len(NIVEIS)] = PESOS["nivel"] * proximidade * nivel_conhecido
+        W[o + len(NIVEIS)] = PESOS["nivel"] * nivel_conhecido
+        o += len(NIVEIS) + 1
+        W[o : o + len(MODELOS)] = PESOS["modelo"] * modelo.T
+        W[o + len(MODELOS)] = PESOS["modelo"] * modelo_conhecido
+        o += len(MODELOS) + 1
+        W[o : o + len(ACESSIBILIDADE)] = PESOS["acessibilidade"] * V.acess[v].T
+        W[o + len(ACESSIBILIDADE)] = PESOS["acessibilidade"]
+        W[-1] = (
+            PESOS["habilidades"] * (qtd_hab == 0)
+            + PESOS["nivel"] * ~nivel_conhecido
+            + PESOS["modelo"] * ~modelo_conhecido
+        )
+        W[:, ~ativo] = 0.0
+        W[-1, ~ativo] = -1.0
+        return W
+
+    def _pesos_todas_vagas(self) -> np.ndarray:
+        # Reaproveitada entre consultas enquanto nenhuma vaga (nem o vocabulário) mudar
+        chave = (self._versao_vagas, len(self.nomes_habilidades))
+        if self._cache_pesos is None or self._cache_pesos[0] != chave:
+            self._cache_pesos = (chave, self._pesos_vagas(slice(0, self.vagas.n)))
+        return self._cache_pesos[1]
+
+    def _pontuar(self, c, W: np.ndarray) -> np.ndarray:
+        """Compatibilidade (candidatos c × vagas de W) em [0, 1]; perfis inativos = -1."""
+        total = self._caracteristicas_candidatos(c) @ W
+        inativos = ~self.candidatos.ativo[c]
+        if inativos.any():
+            total[inativos] = -1.0
+        return total
+
+    def top_vagas_lote(self, k: int = 5, linhas: Optional[np.ndarray] = None):
+        """Top-k vagas para cada candidato (todos, ou só `linhas`), processando em blocos."""
+        with self._trava:
+            linhas = np.arange(self.candidatos.n) if linhas is None else np.asarray(linhas)
+            W = self._pesos_todas_vagas()
+            idx_out, val_out = [], []
+            for inicio in range(0, len(linhas), self.bloco):
+                idx, val = _top_k(self._pontuar(linhas[inicio : inicio + self.bloco], W), k)
+                idx_out.append(idx)
+                val_out.append(val)
+            if not idx_out:
+                return np.zeros((0, 0), dtype=np.int64), np.zeros((0, 0), dtype=np.float32)
+            return np.vstack(idx_out), np.vstack(val_out)
+
+    def top_candidatos_lote(self, k: int = 5, linhas: Optional[np.ndarray] = None):
+        """Top-k candidatos para cada vaga (todas, ou só `linhas`).
+
+        Percorre os candidatos em blocos e funde o top-k corrente de cada vaga com o
+        bloco, então a memória fica em O(bloco × vagas) mesmo com 100k candidatos.
+        """
+        with self._trava:
+            if linhas is None:
+                linhas, W = np.arange(self.vagas.n), self._pesos_todas_vagas()
+            else:
+                linhas = np.asarray(linhas)
+                W = self._pesos_vagas(linhas)
+            k = min(k, self.candidatos.n)
+            melhores_val = np.full((len(linhas), k), -np.inf, dtype=np.float32)
+            melhores_idx = np.zeros((len(linhas), k), dtype=np.int64)
+            for inicio in range(0, self.candidatos.n, self.bloco):
+                fim = min(inicio + self.bloco, self.candidatos.n)
+                bloco = self._pontuar(slice(inicio, fim), W).T
+                val = np.hstack([melhores_val, bloco])
+                idx = np.hstack([melhores_idx, np.broadcast_to(np.arange(inicio, fim), bloco.shape)])
+                sel, melhores_val = _top_k(val, k)
+                melhores_idx = np.take_along_axis(idx, sel, axis=1)
+            return melhores_idx, melhores_val
+
+    def explicar(self, linha_candidato: int, linha_vaga: int) -> list[str]:
+        """Habilidades da vaga que o candidato possui."""
+        n_hab = len(self.nomes_habilidades)
+        comuns = np.flatnonzero(self.candidatos.hab[linha_candidato, :n_hab] & (self.vagas.hab[linha_vaga, :n_hab] > 0))
+        return [self.nomes_habilidades[i] for i in comuns]
+
+    def _resultados(self, pares, valores) -> list[dict]:
+        resultados = []
+        for (linha_c, linha_v), valor in zip(pares, valores):
+            if valor < 0:
+                continue
+            resultados.append({
+                "candidato_id": self.candidatos.ids[linha_c],
+                "nome": self.candidatos.rotulos[linha_c],
+                "vaga_id": self.vagas.ids[linha_v],
+                "titulo": self.vagas.rotulos[linha_v],
+                "compatibilidade": round(float(valor) * 100),
+                "habilidades_em_comum": self.explicar(linha_c, linha_v),
+            })
+        return resultados
+
+    def top_vagas(self, candidato_id: str, k: int = 5) -> Optional[list[dict]]:
+        with self._trava:
+            linha = self.candidatos.linha_por_id.get(candidato_id)
+            if linha is None:
+                return None
+            idx, val = self.top_vagas_lote(k, np.array([linha]))
+            return self._resultados(((linha, v) for v in idx[0]), val[0])
+
+    def top_candidatos(self, vaga_id: str, k: int = 5) -> Optional[list[dict]]:
+        with self._trava:
+            linha = self.vagas.linha_por_id.get(vaga_id)
+            if linha is None:
+                return None
+            idx, val = self.top_candidatos_lote(k, np.array([linha]))
+            return self._resultados(((c, linha) for c in idx[0]), val[0])
+
+
+motor = MotorMatches()
+
+# Com vários workers cada um tem o seu motor: as alterações feitas pela API vão para o
+# registo partilhado e cada worker reaplica as que ainda não viu antes de responder.
+# As vagas do corpus não passam por aqui (são carregadas igual em todos os workers).
+NS_REGISTRO = "matches"
+_sincronia = threading.Lock()
+_ultimo_seq = 0
+
+
+def sincronizar() -> int:
+    """Aplica ao motor local as alterações registadas por qualquer worker; devolve quantas."""
+    global _ultimo_seq
+    with _sincronia:
+        alteracoes = cache.registros_desde(NS_REGISTRO, _ultimo_seq)
+        for seq, chave, valor in alteracoes:
+            tipo, perfil_id = chave.split("/", 1)
+            if valor is None:
+                (motor.remover_candidato if tipo == "candidato" else motor.remover_vaga)(perfil_id)
+            else:
+                (motor.atualizar_candidato if tipo == "candidato" else motor.atualizar_vaga)(perfil_id, **json.loads(valor))
+            _ultimo_seq = seq
+        return len(alteracoes)
+
+
+def registrar(tipo: str, perfil_id: str, campos: Optional[dict]):
+    """Publica a alteração (None = remoção) e aplica-a localmente, junto com as pendentes."""
+    cache.registrar(NS_REGISTRO, f"{tipo}/{perfil_id}", None if campos is None else json.dumps(campos))
+    sincronizar()
+
+
+class PerfilCandidato(BaseModel):
+    nome: Optional[str] = None
+    habilidades: list[str] = Field(default_factory=list, max_length=100)
+    nivel: Optional[Nivel] = None
+    modelos: list[Modelo] = Field(default_factory=list)
+    acessibilidade: list[Literal[tuple(ACESSIBILIDADE)]] = Field(default_factory=list)
+
+
+class PerfilVaga(BaseModel):
+    titulo: Optional[str] = None
+    habilidades: list[str] = Field(default_factory=list, max_length=100)
+    nivel: Optional[Nivel] = None
+    modelo: Optional[Modelo] = None
+    acessibilidade: list[Literal[tuple(ACESSIBILIDADE)]] = Field(default_factory=list)
+
+
+@router.put("/candidatos/{candidato_id}")
+def atualizar_candidato(candidato_id: str, perfil: PerfilCandidato):
+    registrar("candidato", candidato_id, perfil.model_dump())
+    return {"ok": True}
+
+
+@router.delete("/candidatos/{candidato_id}")
+def remover_candidato(candidato_id: str):
+    sincronizar()
+    if candidato_id not in motor.candidatos.linha_por_id:
+        raise HTTPException(status_code=404, detail="Candidato não encontrado.")
+    registrar("candidato", candidato_id, None)
+    return {"ok": True}
+
+
+@router.put("/vagas/{vaga_id}")
+def atualizar_vaga(vaga_id: str, perfil: PerfilVaga):
+    registrar("vaga", vaga_id, perfil.model_dump())
+    return {"ok": True}
+
+
+@router.delete("/vagas/{vaga_id}")
+def remover_vaga(vaga_id: str):
+    sincronizar()
+    if vaga_id not in motor.vagas.linha_por_id:
+        raise HTTPException(status_code=404, detail="Vaga não encontrada.")
+    registrar("vaga", vaga_id, None)
+    return {"ok": True}
+
+
+@router.get("/candidatos/{candidato_id}")
+def melhores_vagas(candidato_id: str, k: int = 5):
+    """Top-k vagas para um candidato, com as habilidades que deram match."""
+    sincronizar()
+    resultados = motor.top_vagas(candidato_id, max(1, min(k, 100)))
+    if resultados is None:
+        raise HTTPException(status_code=404, detail="Candidato não encontrado.")
+    return {"candidato_id": candidato_id, "resultados": resultados}
+
+
+@router.get("/vagas/{vaga_id}")
+def melhores_candidatos(vaga_id: str, k: int = 5):
+    """Top-k candidatos para uma vaga, com as habilidades que deram match."""
+    sincronizar()
+    resultados = motor.top_candidatos(vaga_id, max(1, min(k, 100)))
+    if resultados is None:
+        raise HTTPException(status_code=404, detail="Vaga não encontrada.")
+    return {"vaga_id": vaga_id, "resultados": resultados}
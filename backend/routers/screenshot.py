@@ -1,13 +1,25 @@
 # app/routers/screenshot.py
 
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, HttpUrl
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, HttpUrl
 # --- 1. Importe a versão assíncrona ---
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 from pathlib import Path
+from typing import Literal, Optional
+from urllib.parse import urlsplit
+import asyncio
+import hashlib
+import json
+import os
+import time
 import uuid
 import logging
 
+import metricas
+from cache_compartilhado import cache
+from coalescencia import SingleFlight, normalizar_url
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -15,50 +27,347 @@ router = APIRouter(prefix="/screenshot", tags=["Screenshot"])
 
 SCREENSHOT_DIR = Path("screenshots_gerados")
 SCREENSHOT_DIR.mkdir(exist_ok=True)
+# Páginas mudam: a captura de uma URL só é reaproveitada por pouco tempo
+SCREENSHOT_CACHE_TTL = int(os.getenv("SCREENSHOT_CACHE_TTL", "300"))
 
-class ScreenshotRequest(BaseModel):
-    url: HttpUrl
+# Pedidos simultâneos para a mesma URL partilham um único navegador
+coalescer = SingleFlight("screenshot")
 
-# A função já era 'async', agora o conteúdo dela também será.
-async def take_screenshot_async(url: str) -> str:
-    """Função assíncrona usando a API Async do Playwright."""
-    logger.info(f"Iniciando Playwright async para {url} ...")
-    try:
-        # --- 2. Use 'async with' e 'async_playwright' ---
-        async with async_playwright() as p:
-            logger.info("Playwright async iniciado com sucesso.")
-            # --- 3. Use 'await' para cada operação I/O (rede, processo, etc) ---
-            browser = await p.chromium.launch(headless=True)
+# Lotes: capturas em paralelo no worker (contextos isolados do mesmo Chromium) e por domínio
+LOTE_CONCORRENCIA = int(os.getenv("SCREENSHOT_LOTE_CONCORRENCIA", "6"))
+LOTE_POR_DOMINIO = int(os.getenv("SCREENSHOT_LOTE_POR_DOMINIO", "2"))
+LOTE_MAX_URLS = 500
+# Partilhado por todos os lotes em curso neste worker, para não sobrecarregar o navegador
+_limite_global = asyncio.Semaphore(LOTE_CONCORRENCIA)
+# Capturas de lote em curso por chave (perfil|URL normalizada) e quantos lotes esperam por cada uma
+_capturas_lote: dict[str, asyncio.Task] = {}
+_interessados_lote: dict[asyncio.Task, int] = {}
+
+class PoolNavegador:
+    """Um Chromium por worker, iniciado no arranque e reutilizado entre pedidos.
+
+    Cada captura abre um contexto isolado (cookies, cache e storage próprios) em vez
+    de lançar um navegador novo, o que tira o arranque do Chromium do caminho do pedido.
+    """
+
+    def __init__(self):
+        self._playwright = None
+        self._browser = None
+        self._trava = asyncio.Lock()
+
+    async def iniciar(self):
+        async with self._trava:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+                logger.info("Playwright async iniciado com sucesso.")
+            self._browser = await self._playwright.chromium.launch(headless=True)
             logger.info("Navegador Chromium iniciado em modo headless.")
-            page = await browser.new_page()
+            return self._browser
+
+    async def novo_contexto(self, **opcoes):
+        browser = self._browser
+        if browser is None or not browser.is_connected():
+            # Primeiro uso sem aquecimento, ou o Chromium caiu: (re)inicia
+            browser = await self.iniciar()
+        return await browser.new_context(**opcoes)
+
+    async def parar(self):
+        async with self._trava:
+            if self._browser is not None:
+                await self._browser.close()
+                self._browser = None
+                logger.info("Navegador fechado com sucesso.")
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+
+pool = PoolNavegador()
+
+class PerfilCaptura(BaseModel):
+    """Como carregar e capturar a página. Os perfis abaixo cobrem os casos comuns."""
+    espera: Literal["domcontentloaded", "load", "networkidle"] = "domcontentloaded"
+    timeout_ms: int = 15000
+    # Depois de `espera`, dá até este tempo para o evento `load` (termina antes se chegar)
+    assentar_ms: int = 1500
+    # Em vez de esperar pela rede, espera até duas capturas seguidas do viewport serem iguais
+    estabilidade_visual: bool = False
+    max_estabilidade_ms: int = 3000
+    bloquear_tipos: list[str] = ["font", "media"]
+    bloquear_rastreadores: bool = True
+    pagina_inteira: bool = True
+    largura: int = 1024
+    altura: int = 768
+    formato: Literal["png", "jpeg"] = "jpeg"
+    qualidade_jpeg: int = 75
+
+
+PERFIS = {
+    # Comportamento original: espera a rede ficar ociosa, PNG da página inteira
+    "completo": PerfilCaptura(
+        espera="networkidle", timeout_ms=60000, assentar_ms=0, bloquear_tipos=[],
+        bloquear_rastreadores=False, largura=1280, altura=720, formato="png",
+    ),
+    "rapido": PerfilCaptura(),
+    "estavel": PerfilCaptura(assentar_ms=0, estabilidade_visual=True),
+    "viewport": PerfilCaptura(pagina_inteira=False),
+}
+PERFIL_PADRAO = os.getenv("SCREENSHOT_PERFIL", "rapido")
+
+# Pedidos para estes domínios (analytics, anúncios, mapas de calor) nunca influenciam a captura
+RASTREADORES = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "facebook.net", "connect.facebook.net", "hotjar.com", "clarity.ms", "segment.io",
+    "segment.com", "mixpanel.com", "amplitude.com", "newrelic.com", "nr-data.net", "tiktok.com",
+)
+
+
+def eh_rastreador(url: str) -> bool:
+    host = urlsplit(url).hostname or ""
+    return any(host == dominio or host.endswith("." + dominio) for dominio in RASTREADORES)
+
+
+async def _esperar_estabilidade(page, perfil: PerfilCaptura) -> None:
+    """Captura o viewport em baixa qualidade até duas seguidas serem idênticas (ou acabar o tempo)."""
+    limite = time.perf_counter() + perfil.max_estabilidade_ms / 1000
+    anterior = None
+    while time.perf_counter() < limite:
+        atual = hashlib.sha1(await page.screenshot(type="jpeg", quality=30)).digest()
+        if atual == anterior:
+            return
+        anterior = atual
+        await asyncio.sleep(0.25)
+
+
+async def take_screenshot_async(url: str, perfil: PerfilCaptura = PERFIS["completo"]) -> tuple[str, dict]:
+    """Captura a página num contexto novo do navegador partilhado; devolve o ficheiro e o tempo de cada fase."""
+    logger.info(f"Capturando {url} ...")
+    tempos = {}
+    bloqueados = 0
+    inicio = marca = time.perf_counter()
+
+    def fase(nome):
+        nonlocal marca
+        agora = time.perf_counter()
+        tempos[nome] = round((agora - marca) * 1000, 1)
+        marca = agora
+
+    async def filtrar(route):
+        nonlocal bloqueados
+        pedido = route.request
+        if pedido.resource_type in perfil.bloquear_tipos or (perfil.bloquear_rastreadores and eh_rastreador(pedido.url)):
+            bloqueados += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    try:
+        context = await pool.novo_contexto(viewport={"width": perfil.largura, "height": perfil.altura}, device_scale_factor=1)
+        try:
+            if perfil.bloquear_tipos or perfil.bloquear_rastreadores:
+                await context.route("**/*", filtrar)
+            page = await context.new_page()
+            fase("contexto_ms")
+
             logger.info(f"Navegando para {url} ...")
-            await page.goto(url, wait_until="networkidle", timeout=60000)
-            
-            file_name = f"{uuid.uuid4()}.png"
+            await page.goto(url, wait_until=perfil.espera, timeout=perfil.timeout_ms)
+            fase("navegacao_ms")
+
+            if perfil.assentar_ms:
+                try:
+                    await page.wait_for_load_state("load", timeout=perfil.assentar_ms)
+                except PlaywrightTimeoutError:
+                    pass  # o limite é o objetivo: captura com o que já carregou
+            if perfil.estabilidade_visual:
+                await _esperar_estabilidade(page, perfil)
+            fase("assentar_ms")
+
+            extensao = "jpg" if perfil.formato == "jpeg" else "png"
+            file_name = f"{uuid.uuid4()}.{extensao}"
             file_path = SCREENSHOT_DIR / file_name
-            
+
             logger.info(f"Tirando screenshot e salvando em {file_path} ...")
-            await page.screenshot(path=str(file_path), full_page=True)
-            await browser.close()
-            logger.info("Navegador fechado com sucesso.")
-            return str(file_name)
+            opcoes = {"quality": perfil.qualidade_jpeg} if perfil.formato == "jpeg" else {}
+            await page.screenshot(path=str(file_path), full_page=perfil.pagina_inteira, type=perfil.formato, **opcoes)
+            fase("captura_ms")
+        finally:
+            await context.close()
     except Exception as e:
         logger.exception("Erro no take_screenshot_async")
         # O traceback original do Playwright é mais útil aqui
         raise HTTPException(status_code=500, detail=f"Erro ao tirar screenshot: {str(e)}")
 
+    tempos["total_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+    tempos["pedidos_bloqueados"] = bloqueados
+    logger.info(f"Captura de {url} concluída: {tempos}")
+    return str(file_name), tempos
+
+def _registrar_tempos(nome_perfil: str, tempos: dict) -> None:
+    metricas.incrementar(f"screenshot.{nome_perfil}.capturas")
+    for fase, valor in tempos.items():
+        metricas.incrementar(f"screenshot.{nome_perfil}.{fase}", valor)
+
+async def _capturar_e_guardar(url: str, nome_perfil: str, chave: Optional[str]) -> tuple[str, dict]:
+    """Captura, regista os tempos e, com `chave`, guarda o resultado no cache partilhado."""
+    file_name, tempos = await take_screenshot_async(url, PERFIS[nome_perfil])
+    _registrar_tempos(nome_perfil, tempos)
+    if chave:
+        valor = json.dumps({"arquivo": file_name, "tempos": tempos})
+        await asyncio.to_thread(cache.guardar, "screenshot", chave, valor, SCREENSHOT_CACHE_TTL)
+    return file_name, tempos
+
+async def _ler_cache(chave: str) -> Optional[tuple[str, dict]]:
+    em_cache = await asyncio.to_thread(cache.obter, "screenshot", chave)
+    if em_cache:
+        guardado = json.loads(em_cache)
+        if (SCREENSHOT_DIR / guardado["arquivo"]).exists():
+            return guardado["arquivo"], {**guardado["tempos"], "cache": True}
+    return None
+
+async def capturar_com_cache(url: str, sessao_id: Optional[str] = None, nome_perfil: str = PERFIL_PADRAO) -> tuple[str, dict]:
+    """Captura partilhada: cache entre workers, depois coalescência dos pedidos em curso.
+
+    O perfil faz parte da chave: a mesma URL em perfis diferentes são capturas diferentes.
+    """
+    chave = f"{nome_perfil}|{normalizar_url(url)}"
+    if sessao_id:
+        # A página pode ter mudado depois de uma ação do usuário: sem cache, e sem partilhar com outras sessões
+        return await coalescer.executar(f"{sessao_id}|{chave}", lambda: _capturar_e_guardar(url, nome_perfil, None))
+    guardado = await _ler_cache(chave)
+    if guardado:
+        return guardado
+    return await coalescer.executar(chave, lambda: _capturar_e_guardar(url, nome_perfil, chave))
+
+class ScreenshotRequest(BaseModel):
+    url: HttpUrl
+    # Capturas de uma sessão (modo "o que mudou") têm de ser sempre novas
+    sessao_id: Optional[str] = None
+    # Nome de um dos PERFIS; por omissão SCREENSHOT_PERFIL
+    perfil: Optional[str] = None
+
 # Este endpoint é síncrono e não é usado pelo agente, mas vamos deixar como está
 @router.post("/tirar-print")
 async def tirar_print(request: ScreenshotRequest):
     logger.info(f"Recebida requisição para tirar print da URL: {request.url}")
     try:
         # Agora este endpoint também precisa ser async para poder usar 'await'
-        file_path = await take_screenshot_async(str(request.url))
+        perfil = request.perfil or PERFIL_PADRAO
+        if perfil not in PERFIS:
+            raise HTTPException(status_code=400, detail=f"Perfil desconhecido. Use um de: {', '.join(PERFIS)}.")
+        file_path, tempos = await capturar_com_cache(str(request.url), request.sessao_id, perfil)
         logger.info(f"Screenshot salvo com sucesso em {file_path}.")
-        return {"status": "sucesso", "caminho_do_arquivo": file_path}
+        return {"status": "sucesso", "caminho_do_arquivo": file_path, "perfil": perfil, "tempos": tempos}
     except HTTPException as http_exc:
         logger.error(f"Erro HTTP ao tirar print: {http_exc.detail}")
         raise http_exc
     except Exception as e:
         logger.error(f"Erro inesperado ao tirar print: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Erro inesperado: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Erro inesperado: {str(e)}")
+
+
+class LoteRequest(BaseModel):
+    urls: list[HttpUrl] = Field(..., min_length=1, max_length=LOTE_MAX_URLS)
+    perfil: Optional[str] = None
+    por_dominio: int = Field(LOTE_POR_DOMINIO, ge=1, le=LOTE_CONCORRENCIA)
+    # Limite por URL; uma URL que o excede falha sozinha, o lote continua
+    timeout_s: float = Field(30.0, gt=0, le=120)
+
+def _linha(tipo: str, **dados) -> bytes:
+    return (json.dumps({"tipo": tipo, **dados}, ensure_ascii=False) + "\n").encode("utf-8")
+
+async def _capturar_limitado(url: str, perfil: str, chave: str, dominio: asyncio.Semaphore, timeout_s: float) -> tuple[str, dict]:
+    # Primeiro o domínio, depois a vaga global: quem espera pelo domínio não ocupa vaga global
+    async with dominio, _limite_global:
+        # Fora da coalescência (que protege a captura com shield): aqui o tempo limite
+        # cancela mesmo a captura, o contexto fecha e só então as vagas são libertadas
+        return await asyncio.wait_for(_capturar_e_guardar(url, perfil, chave), timeout_s)
+
+async def _capturar_partilhado(url: str, perfil: str, chave: str, dominio: asyncio.Semaphore, timeout_s: float) -> tuple[str, dict]:
+    """Uma captura por chave entre todos os lotes em curso no worker.
+
+    Quem chega depois espera pela captura já lançada (com as vagas e o tempo limite do
+    primeiro lote). Ela só é cancelada quando já nenhum lote espera por ela.
+    """
+    tarefa = _capturas_lote.get(chave)
+    if tarefa is None:
+        tarefa = asyncio.ensure_future(_capturar_limitado(url, perfil, chave, dominio, timeout_s))
+        _capturas_lote[chave] = tarefa
+        tarefa.add_done_callback(lambda t: _capturas_lote.pop(chave) if _capturas_lote.get(chave) is t else None)
+    else:
+        metricas.incrementar("screenshot.lote.coalescidas")
+    _interessados_lote[tarefa] = _interessados_lote.get(tarefa, 0) + 1
+    try:
+        return await asyncio.shield(tarefa)
+    finally:
+        _interessados_lote[tarefa] -= 1
+        if not _interessados_lote[tarefa]:
+            del _interessados_lote[tarefa]
+            tarefa.cancel()
+
+async def _capturar_no_lote(chave: str, url: str, perfil: str, dominio: asyncio.Semaphore, timeout_s: float) -> dict:
+    inicio = time.perf_counter()
+    try:
+        resultado = await _ler_cache(chave) or await _capturar_partilhado(url, perfil, chave, dominio, timeout_s)
+        file_name, tempos = resultado
+        return {"status": "sucesso", "caminho_do_arquivo": file_name, "tempos": tempos}
+    except asyncio.TimeoutError:
+        detalhe = f"Tempo limite de {timeout_s:g} s excedido."
+    except HTTPException as e:
+        detalhe = e.detail
+    except Exception as e:
+        logger.error(f"Erro inesperado no lote para {url}: {e}", exc_info=True)
+        detalhe = str(e)
+    return {"status": "erro", "detalhe": detalhe, "tempos": {"total_ms": round((time.perf_counter() - inicio) * 1000, 1)}}
+
+async def _executar_lote(urls: list[str], perfil: str, por_dominio: int, timeout_s: float):
+    inicio = time.perf_counter()
+    # URLs repetidas (mesma chave) no lote: uma captura, um resultado por índice original
+    pedidos: dict[str, list[tuple[int, str]]] = {}
+    for indice, url in enumerate(urls):
+        pedidos.setdefault(f"{perfil}|{normalizar_url(url)}", []).append((indice, url))
+    if len(pedidos) < len(urls):
+        metricas.incrementar("screenshot.lote.duplicadas", len(urls) - len(pedidos))
+
+    dominios: dict[str, asyncio.Semaphore] = {}
+    tarefas = {}
+    for chave, itens in pedidos.items():
+        url = itens[0][1]
+        dominio = dominios.setdefault(urlsplit(url).hostname or "", asyncio.Semaphore(por_dominio))
+        tarefas[asyncio.create_task(_capturar_no_lote(chave, url, perfil, dominio, timeout_s))] = itens
+    sucessos = 0
+    try:
+        # Cada resultado sai assim que a captura termina, não pela ordem do pedido
+        pendentes = set(tarefas)
+        while pendentes:
+            prontas, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+            for tarefa in prontas:
+                resultado = tarefa.result()
+                for indice, url in tarefas[tarefa]:
+                    sucessos += resultado["status"] == "sucesso"
+                    if resultado["status"] == "erro":
+                        metricas.incrementar("screenshot.lote.erros")
+                    yield _linha("resultado", indice=indice, url=url, **resultado)
+        yield _linha(
+            "fim", total=len(urls), sucessos=sucessos, erros=len(urls) - sucessos,
+            total_ms=round((time.perf_counter() - inicio) * 1000, 1),
+        )
+    finally:
+        # Cliente desligou a meio: não continua a capturar para ninguém
+        for tarefa in tarefas:
+            tarefa.cancel()
+
+@router.post("/lote")
+async def tirar_prints_em_lote(request: LoteRequest):
+    """Captura várias URLs em paralelo (limite global e por domínio) e devolve NDJSON à medida que terminam."""
+    perfil = request.perfil or PERFIL_PADRAO
+    if perfil not in PERFIS:
+        raise HTTPException(status_code=400, detail=f"Perfil desconhecido. Use um de: {', '.join(PERFIS)}.")
+    logger.info(f"Recebido lote de {len(request.urls)} URLs (perfil {perfil}).")
+    metricas.incrementar("screenshot.lote.urls", len(request.urls))
+    return StreamingResponse(
+        _executar_lote([str(u) for u in request.urls], perfil, request.por_dominio, request.timeout_s),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,310 @@
+# app/routers/sessao.py
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel
+from collections import OrderedDict, deque
+from typing import Optional
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import uuid
+
+from cache_compartilhado import cache
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/sessao", tags=["Sessão"])
+
+# --- Limites por conexão e por sessão ---
+MAX_QUADRO_BYTES = int(os.getenv("SESSAO_MAX_QUADRO_BYTES", str(64 * 1024)))
+MAX_EVENTOS_POR_LOTE = int(os.getenv("SESSAO_MAX_EVENTOS_POR_LOTE", "200"))
+MAX_FILA_ENVIO = int(os.getenv("SESSAO_MAX_FILA_ENVIO", "64"))
+MAX_LINHAS_TRANSCRICAO = int(os.getenv("SESSAO_MAX_LINHAS", "200"))
+MAX_CHARS_LINHA = int(os.getenv("SESSAO_MAX_CHARS_LINHA", "4000"))
+MAX_SESSOES = int(os.getenv("SESSAO_MAX_SESSOES", "1000"))
+# Cópia da transcrição no cache partilhado, para qualquer worker a poder ler
+TTL_TRANSCRICAO_PARTILHADA = int(os.getenv("SESSAO_TTL_PARTILHADA", str(6 * 3600)))
+
+# Enquadramento binário: 1 byte de tipo + JSON em UTF-8.
+# O cliente também pode enviar quadros de texto com o mesmo JSON (útil para depuração).
+QUADRO_LOTE = 1      # cliente -> servidor: {"eventos": [...]}
+QUADRO_SERVIDOR = 2  # servidor -> cliente: {"k": "ack" | "push" | "erro", ...}
+
+# Fecho enviado à conexão antiga quando outra abre para o mesmo client_id
+CODIGO_SUBSTITUIDA = 4000
+
+PAPEIS_VALIDOS = {"Você", "Farol"}
+CLIENT_ID_RE = re.compile(r"^[A-Za-z0-9-]{8,64}$")
+
+
+def codificar_quadro(tipo: int, payload: dict) -> bytes:
+    """Serializa um quadro binário (tipo + JSON)."""
+    return bytes([tipo]) + json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decodificar_quadro(dados: bytes) -> tuple[int, dict]:
+    """Lê um quadro binário e devolve (tipo, payload)."""
+    if not dados:
+        raise ValueError("Quadro vazio.")
+    payload = json.loads(dados[1:].decode("utf-8"))
+    if not isinstance(payload, dict):
+        raise ValueError("Payload do quadro deve ser um objeto JSON.")
+    return dados[0], payload
+
+
+class TranscricaoSessao:
+    """Buffer circular compacto com as falas de uma entrevista.
+
+    Deltas consecutivos do mesmo papel são concatenados na mesma linha até
+    chegar um delta marcado como final, então a memória cresce por fala e
+    não por evento.
+    """
+
+    def __init__(self, max_linhas: int = MAX_LINHAS_TRANSCRICAO):
+        self.linhas: deque[list] = deque(maxlen=max_linhas)  # [seq, papel, texto, final]
+        self.seq = 0
+        self.atualizado_em = time.time()
+
+    def anexar(self, papel: str, delta: str, final: bool = False) -> None:
+        ultima = self.linhas[-1] if self.linhas else None
+        if ultima is not None and ultima[1] == papel and not ultima[3]:
+            if len(ultima[2]) < MAX_CHARS_LINHA:
+                ultima[2] = (ultima[2] + delta)[:MAX_CHARS_LINHA]
+            ultima[3] = final
+        else:
+            self.seq += 1
+            self.linhas.append([self.seq, papel, delta[:MAX_CHARS_LINHA], final])
+        self.atualizado_em = time.time()
+
+    @classmethod
+    def de_instantaneo(cls, instantaneo: dict) -> "TranscricaoSessao":
+        """Reconstrói a sessão a partir da cópia partilhada, mantendo os números de sequência."""
+        sessao = cls()
+        for linha in instantaneo["linhas"]:
+            sessao.linhas.append([linha["seq"], linha["papel"], linha["texto"], linha["final"]])
+        sessao.seq = sessao.linhas[-1][0] if sessao.linhas else 0
+        sessao.atualizado_em = instantaneo["atualizado_em"]
+        return sessao
+
+    def como_dict(self, desde: int = 0) -> list[dict]:
+        return [
+            {"seq": seq, "papel": papel, "texto": texto, "final": final}
+            for seq, papel, texto, final in self.linhas
+            if seq >= desde
+        ]
+
+
+class Conexao:
+    """Estado de uma conexão WebSocket com fila de envio limitada."""
+
+    def __init__(self, client_id: str, websocket: WebSocket):
+        self.client_id = client_id
+        self.websocket = websocket
+        self.fila: asyncio.Queue[bytes] = asyncio.Queue(maxsize=MAX_FILA_ENVIO)
+        self.descartadas = 0
+        # Identifica a conexão no instantâneo partilhado (pode haver outra noutro worker)
+        self.id = uuid.uuid4().hex
+
+    def enfileirar(self, payload: dict) -> None:
+        """Enfileira um quadro; se a fila estiver cheia descarta o mais antigo."""
+        quadro = codificar_quadro(QUADRO_SERVIDOR, payload)
+        if self.fila.full():
+            self.fila.get_nowait()
+            self.descartadas += 1
+        self.fila.put_nowait(quadro)
+
+    async def laco_envio(self) -> None:
+        while True:
+            quadro = await self.fila.get()
+            await self.websocket.send_bytes(quadro)
+
+
+# Sessões em memória (LRU) e conexões abertas, ambas por client_id.
+TRANSCRICOES: "OrderedDict[str, TranscricaoSessao]" = OrderedDict()
+CONEXOES: dict[str, Conexao] = {}
+
+
+def obter_transcricao(client_id: str, criar: bool = False) -> Optional[TranscricaoSessao]:
+    sessao = TRANSCRICOES.get(client_id)
+    if sessao is None and criar:
+        sessao = TRANSCRICOES[client_id] = TranscricaoSessao()
+        while len(TRANSCRICOES) > MAX_SESSOES:
+            TRANSCRICOES.popitem(last=False)
+    if sessao is not None:
+        TRANSCRICOES.move_to_end(client_id)
+    return sessao
+
+
+def processar_lote(client_id: str, eventos: list) -> int:
+    """Aplica um lote de eventos do cliente e devolve quantos foram aceites."""
+    aceites = 0
+    logs = []
+    for evento in eventos[:MAX_EVENTOS_POR_LOTE]:
+        if not isinstance(evento, dict):
+            continue
+        tipo = evento.get("k")
+        if tipo == "transcricao":
+            papel = evento.get("papel")
+            delta = evento.get("delta")
+            if papel not in PAPEIS_VALIDOS or not isinstance(delta, str):
+                continue
+            obter_transcricao(client_id, criar=True).anexar(papel, delta, bool(evento.get("final")))
+        elif tipo == "log":
+            logs.append({"type": evento.get("type"), "message": evento.get("message"), "data": evento.get("data")})
+        else:
+            continue
+        aceites += 1
+    if logs:
+        # Uma linha de log por lote em vez de uma por evento.
+        logger.info("client.log %s", json.dumps({"client_id": client_id, "eventos": logs}, ensure_ascii=False))
+    return aceites
+
+
+def ler_instantaneo(client_id: str) -> Optional[dict]:
+    partilhado = cache.obter("transcricao", client_id)
+    return json.loads(partilhado) if partilhado is not None else None
+
+
+def retomar_transcricao(client_id: str) -> None:
+    """Ao abrir a conexão neste worker, continua a partir da cópia partilhada se for mais recente.
+
+    A conexão anterior pode ter estado noutro worker (reconexão) ou este pode ter uma cópia
+    antiga de quando a tinha; sem isto a sessão recomeçaria em seq 1 e apagaria o histórico.
+    """
+    instantaneo = ler_instantaneo(client_id)
+    if instantaneo is None:
+        return
+    local = TRANSCRICOES.get(client_id)
+    if local is None or instantaneo["atualizado_em"] > local.atualizado_em:
+        TRANSCRICOES[client_id] = TranscricaoSessao.de_instantaneo(instantaneo)
+        obter_transcricao(client_id)  # aplica o LRU
+
+
+def publicar_transcricao(client_id: str, conexao_id: str, ativa: bool) -> None:
+    """Grava um instantâneo da transcrição no cache partilhado entre workers.
+
+    Ao fechar (`ativa=False`) só grava se o instantâneo ainda for desta conexão: se o
+    cliente já reconectou noutro worker, a cópia local daqui está desatualizada.
+    """
+    if not ativa:
+        atual = ler_instantaneo(client_id)
+        if atual is not None and atual.get("conexao") != conexao_id:
+            return
+    sessao = TRANSCRICOES.get(client_id)
+    if sessao is None:
+        sessao = obter_transcricao(client_id, criar=True)
+    instantaneo = {
+        "linhas": sessao.como_dict(),
+        "atualizado_em": sessao.atualizado_em,
+        "ativa": ativa,
+        "conexao": conexao_id,
+    }
+    cache.guardar("transcricao", client_id, json.dumps(instantaneo, ensure_ascii=False), TTL_TRANSCRICAO_PARTILHADA)
+
+
+def enviar_para_cliente(client_id: str, payload: dict) -> bool:
+    """Envia uma mensagem do servidor para o cliente, se estiver conectado."""
+    conexao = CONEXOES.get(client_id)
+    if conexao is None:
+        return False
+    conexao.enfileirar({"k": "push", "dados": payload})
+    return True
+
+
+@router.websocket("/ws/{client_id}")
+async def sessao_ws(websocket: WebSocket, client_id: str):
+    """Conexão única por entrevista: logs em lote, deltas de transcrição e envios do servidor."""
+    if not CLIENT_ID_RE.match(client_id):
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    conexao = Conexao(client_id, websocket)
+    anterior = CONEXOES.get(client_id)
+    if anterior is not None:
+        # Uma conexão por entrevista: a antiga deixa de escrever na transcrição
+        logger.info(f"Substituindo conexão anterior do cliente {client_id}.")
+        try:
+            await anterior.websocket.close(code=CODIGO_SUBSTITUIDA)
+        except RuntimeError:
+            pass  # já estava fechada
+    CONEXOES[client_id] = conexao
+    await asyncio.to_thread(retomar_transcricao, client_id)
+    # Marca já esta conexão como dona do instantâneo (e a sessão como ativa para os outros workers)
+    await asyncio.to_thread(publicar_transcricao, client_id, conexao.id, True)
+    envio = asyncio.create_task(conexao.laco_envio())
+    logger.info(f"WebSocket aberto para o cliente {client_id}.")
+    publicado_em = 0.0
+    try:
+        while True:
+            mensagem = await websocket.receive()
+            if mensagem["type"] == "websocket.disconnect":
+                break
+            if mensagem.get("bytes") is not None:
+                dados = mensagem["bytes"]
+            else:
+                dados = bytes([QUADRO_LOTE]) + (mensagem.get("text") or "").encode("utf-8")
+            if len(dados) > MAX_QUADRO_BYTES:
+                conexao.enfileirar({"k": "erro", "motivo": "quadro_grande_demais"})
+                continue
+            try:
+                tipo, payload = decodificar_quadro(dados)
+            except (ValueError, UnicodeDecodeError) as e:
+                conexao.enfileirar({"k": "erro", "motivo": f"quadro_invalido: {e}"})
+                continue
+            if tipo != QUADRO_LOTE or not isinstance(payload.get("eventos"), list):
+                conexao.enfileirar({"k": "erro", "motivo": "tipo_desconhecido"})
+                continue
+            aceites = processar_lote(client_id, payload["eventos"])
+            conexao.enfileirar({"k": "ack", "lote": payload.get("lote"), "aceites": aceites})
+            sessao = TRANSCRICOES.get(client_id)
+            if sessao is not None and sessao.atualizado_em > publicado_em:
+                publicado_em = sessao.atualizado_em
+                await asyncio.to_thread(publicar_transcricao, client_id, conexao.id, True)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        envio.cancel()
+        if CONEXOES.get(client_id) is conexao:
+            del CONEXOES[client_id]
+            await asyncio.to_thread(publicar_transcricao, client_id, conexao.id, False)
+        logger.info(f"WebSocket fechado para o cliente {client_id} (quadros descartados: {conexao.descartadas}).")
+
+
+class PushRequest(BaseModel):
+    dados: dict
+
+
+@router.post("/{client_id}/push")
+async def push_para_cliente(client_id: str, request: PushRequest):
+    if not enviar_para_cliente(client_id, request.dados):
+        raise HTTPException(status_code=404, detail="Cliente não conectado.")
+    return {"ok": True}
+
+
+@router.get("/{client_id}/transcricao")
+async def ler_transcricao(client_id: str, desde: int = 0):
+    """Devolve as falas da sessão (opcionalmente a partir de um número de sequência)."""
+    if client_id in CONEXOES:
+        # Este worker tem a conexão viva: a cópia local é a mais recente
+        sessao = obter_transcricao(client_id)
+        linhas = sessao.como_dict(desde) if sessao is not None else []
+        return {
+            "client_id": client_id,
+            "linhas": linhas,
+            "ativa": True,
+            "atualizado_em": sessao.atualizado_em if sessao is not None else None,
+        }
+    # A conexão pode estar noutro worker (ou já ter fechado): vale a cópia partilhada
+    instantaneo = await asyncio.to_thread(ler_instantaneo, client_id)
+    if instantaneo is None:
+        return {"client_id": client_id, "linhas": [], "ativa": False}
+    return {
+        "client_id": client_id,
+        "linhas": [linha for linha in instantaneo["linhas"] if linha["seq"] >= desde],
+        "ativa": instantaneo["ativa"],
+        "atualizado_em": instantaneo["atualizado_em"],
+    }
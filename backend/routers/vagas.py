@@ -0,0 +1,245 @@
+# app/routers/vagas.py
+
+from fastapi import APIRouter, HTTPException, Query
+from pathlib import Path
+from typing import Literal, Optional
+import bisect
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+import numpy as np
+
+from routers import matches
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/vagas", tags=["Vagas"])
+
+VAGAS_ARQUIVO = Path(os.getenv("VAGAS_ARQUIVO", "dados/vagas.jsonl"))
+# Quantas vagas do corpus também alimentam o motor de matches
+MATCHES_MAX_VAGAS = int(os.getenv("MATCHES_MAX_VAGAS_DO_CORPUS", "10000"))
+MIN_PREFIXO = 2
+MAX_LIMITE = 100
+
+FACETAS = ("area", "nivel", "modelo", "acessibilidade")
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalizar_texto(texto: str) -> str:
+    """Minúsculas e sem acentos, para busca por prefixo/texto."""
+    sem_acento = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return sem_acento.lower()
+
+
+def tokenizar(texto: str) -> list[str]:
+    return TOKEN_RE.findall(normalizar_texto(texto))
+
+
+def _bitset(posicoes, n_palavras: int) -> np.ndarray:
+    """Converte uma lista de posições num bitset (uint64, bit i = documento i)."""
+    bits = np.zeros(n_palavras * 64, dtype=bool)
+    bits[np.asarray(posicoes, dtype=np.int64)] = True
+    return np.packbits(bits, bitorder="little").view(np.uint64)
+
+
+class IndiceVagas:
+    """Índice em memória do corpus de vagas.
+
+    - facetas: um bitset por valor, então filtros E/OU são ANDs/ORs de arrays uint64;
+    - texto: índice invertido token -> posições, com vocabulário ordenado para prefixos;
+    - documentos: só o offset de cada linha no ficheiro; a página pedida é lida com pread.
+    """
+
+    def __init__(self, caminho: Path):
+        self.caminho = caminho
+        self.facetas: dict[str, dict[str, np.ndarray]] = {f: {} for f in FACETAS}
+        self.postings: dict[str, np.ndarray] = {}
+        self.vocabulario: list[str] = []
+        self.offsets = np.zeros(0, dtype=np.int64)
+        self.n = 0
+        self.n_palavras = 0
+        self.todos = np.zeros(0, dtype=np.uint64)
+        self._fd = None
+
+    def carregar(self) -> "IndiceVagas":
+        inicio = time.perf_counter()
+        if not self.caminho.exists():
+            logger.warning(f"Ficheiro de vagas {self.caminho} não encontrado; índice vazio.")
+            return self
+        offsets = []
+        por_faceta: dict[str, dict[str, list[int]]] = {f: {} for f in FACETAS}
+        por_token: dict[str, list[int]] = {}
+        with open(self.caminho, "rb") as f:
+            pos = 0
+            for linha in f:
+                inicio_linha, pos = pos, pos + len(linha)
+                if not linha.strip():
+                    continue
+                vaga = json.loads(linha)
+                doc = len(offsets)
+                offsets.append(inicio_linha)
+                for faceta in FACETAS:
+                    valores = vaga.get(faceta) or []
+                    for valor in valores if isinstance(valores, list) else [valores]:
+                        por_faceta[faceta].setdefault(valor, []).append(doc)
+                texto = " ".join([vaga.get("titulo") or "", " ".join(vaga.get("requisitos") or [])])
+                for token in set(tokenizar(texto)):
+                    por_token.setdefault(token, []).append(doc)
+
+        self.n = len(offsets)
+        self.n_palavras = (self.n + 63) // 64
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.todos = _bitset(range(self.n), self.n_palavras)
+        for faceta, valores in por_faceta.items():
+            self.facetas[faceta] = {v: _bitset(docs, self.n_palavras) for v, docs in valores.items()}
+        # Documentos entram em ordem crescente, então as listas já estão ordenadas
+        self.postings = {t: np.asarray(docs, dtype=np.uint32) for t, docs in por_token.items()}
+        self.vocabulario = sorted(self.postings)
+        self._fd = os.open(self.caminho, os.O_RDONLY)
+        logger.info(
+            f"Índice de vagas carregado: {self.n} vagas, {len(self.vocabulario)} tokens "
+            f"em {(time.perf_counter() - inicio):.1f} s."
+        )
+        return self
+
+    def ler(self, doc: int) -> dict:
+        inicio = int(self.offsets[doc])
+        fim = int(self.offsets[doc + 1]) if doc + 1 < self.n else os.fstat(self._fd).st_size
+        vaga = json.loads(os.pread(self._fd, fim - inicio, inicio))
+        vaga.setdefault("id", str(doc))
+        return vaga
+
+    # --- consulta ---
+
+    def _bits_termo(self, termo: str, prefixo: bool) -> np.ndarray:
+        if not prefixo:
+            docs = self.postings.get(termo)
+            return _bitset(docs if docs is not None else [], self.n_palavras)
+        ini = bisect.bisect_left(self.vocabulario, termo)
+        # Tokens só têm [a-z0-9]: o limite superior é o prefixo com o último caractere incrementado
+        fim = bisect.bisect_left(self.vocabulario, termo[:-1] + chr(ord(termo[-1]) + 1), ini)
+        if fim == ini:
+            return np.zeros(self.n_palavras, dtype=np.uint64)
+        if fim - ini == 1:
+            return _bitset(self.postings[self.vocabulario[ini]], self.n_palavras)
+        docs = np.concatenate([self.postings[t] for t in self.vocabulario[ini:fim]])
+        return _bitset(docs, self.n_palavras)
+
+    def _bits_faceta(self, faceta: str, valores: list[str], todos: bool) -> np.ndarray:
+        vazio = np.zeros(self.n_palavras, dtype=np.uint64)
+        bitsets = [self.facetas[faceta].get(v, vazio) for v in valores]
+        if todos:
+            return np.bitwise_and.reduce(bitsets)
+        return np.bitwise_or.reduce(bitsets)
+
+    def buscar(self, q: str = "", filtros: Optional[dict[str, list[str]]] = None,
+               modo_acessibilidade: str = "todos", limite: int = 20, cursor: int = -1) -> dict:
+        resultado = self.todos.copy()
+        # Texto: todos os termos têm de aparecer; o último é tratado como prefixo (busca enquanto digita)
+        termos = tokenizar(q)
+        for i, termo in enumerate(termos):
+            prefixo = i == len(termos) - 1 and len(termo) >= MIN_PREFIXO
+            resultado &= self._bits_termo(termo, prefixo)
+        # Facetas: OU dentro da faceta, E entre facetas
+        for faceta, valores in (filtros or {}).items():
+            if valores:
+                todos = faceta == "acessibilidade" and modo_acessibilidade == "todos"
+                resultado &= self._bits_faceta(faceta, valores, todos)
+
+        total = int(np.bitwise_count(resultado).sum())
+        contagens = {
+            faceta: {v: int(np.bitwise_count(resultado & bits).sum()) for v, bits in valores.items()}
+            for faceta, valores in self.facetas.items()
+        }
+        docs = self._proximos(resultado, cursor, limite)
+        proximo = int(docs[-1]) if len(docs) == limite else None
+        return {
+            "total": total,
+            "resultados": [self.ler(int(d)) for d in docs],
+            "proximo_cursor": proximo,
+            "facetas": contagens,
+        }
+
+    def _proximos(self, bits: np.ndarray, depois: int, limite: int, janela: int = 1024) -> np.ndarray:
+        """Primeiros `limite` documentos do bitset com posição > `depois` (paginação por cursor)."""
+        encontrados = []
+        restante = limite
+        palavra = (depois + 1) // 64
+        while restante > 0 and palavra < self.n_palavras:
+            bloco = bits[palavra : palavra + janela]
+            if palavra == (depois + 1) // 64 and depois >= 0:
+                # Zera os bits até ao cursor na primeira palavra
+                bloco = bloco.copy()
+                bloco[0] &= ~np.uint64((1 << ((depois + 1) % 64)) - 1)
+            nao_vazias = np.flatnonzero(bloco)
+            if len(nao_vazias):
+                desempacotado = np.unpackbits(bloco[nao_vazias].view(np.uint8), bitorder="little").reshape(-1, 64)
+                linhas, colunas = np.nonzero(desempacotado)
+                docs = (palavra + nao_vazias[linhas]) * 64 + colunas
+                encontrados.append(docs[:restante])
+                restante -= len(encontrados[-1])
+            palavra += janela
+        return np.concatenate(encontrados) if encontrados else np.zeros(0, dtype=np.int64)
+
+
+_indice: Optional[IndiceVagas] = None
+_trava_indice = threading.Lock()
+
+
+def alimentar_matches(indice: IndiceVagas, maximo: int = MATCHES_MAX_VAGAS):
+    """Envia as primeiras vagas do corpus para o motor de matches."""
+    for doc in range(min(indice.n, maximo)):
+        vaga = indice.ler(doc)
+        modelo = vaga.get("modelo")
+        matches.motor.atualizar_vaga(
+            str(vaga["id"]),
+            titulo=vaga.get("titulo"),
+            habilidades=vaga.get("requisitos") or [],
+            nivel=vaga.get("nivel") if vaga.get("nivel") in matches.NIVEIS else None,
+            modelo=modelo if modelo in matches.MODELOS else None,
+            acessibilidade=[a for a in vaga.get("acessibilidade") or [] if a in matches.ACESSIBILIDADE],
+        )
+
+
+def obter_indice() -> IndiceVagas:
+    """Carrega o índice uma única vez por processo."""
+    global _indice
+    if _indice is None:
+        with _trava_indice:
+            if _indice is None:
+                indice = IndiceVagas(VAGAS_ARQUIVO).carregar()
+                alimentar_matches(indice)
+                _indice = indice
+    return _indice
+
+
+@router.get("")
+def buscar_vagas(
+    q: str = "",
+    area: list[str] = Query(default=[]),
+    nivel: list[str] = Query(default=[]),
+    modelo: list[str] = Query(default=[]),
+    acessibilidade: list[str] = Query(default=[]),
+    modo_acessibilidade: Literal["todos", "qualquer"] = "todos",
+    limite: int = 20,
+    cursor: Optional[int] = Query(None, ge=0),
+):
+    """Busca de vagas com filtros por faceta, texto/prefixo, contagens por faceta e paginação por cursor."""
+    if not 1 <= limite <= MAX_LIMITE:
+        raise HTTPException(status_code=400, detail=f"limite deve estar entre 1 e {MAX_LIMITE}.")
+    indice = obter_indice()
+    inicio = time.perf_counter()
+    resposta = indice.buscar(
+        q=q,
+        filtros={"area": area, "nivel": nivel, "modelo": modelo, "acessibilidade": acessibilidade},
+        modo_acessibilidade=modo_acessibilidade,
+        limite=limite,
+        cursor=-1 if cursor is None else cursor,
+    )
+    resposta["tempo_ms"] = round((time.perf_counter() - inicio) * 1000, 2)
+    return resposta
@@ -0,0 +1,95 @@
+(function () {
+  // Conexão WebSocket única por entrevista (logs em lote, transcrição incremental e envios do servidor).
+  // Quadros binários: 1 byte de tipo + JSON em UTF-8 (1 = lote do cliente, 2 = mensagem do servidor).
+  const QUADRO_LOTE = 1;
+  const QUADRO_SERVIDOR = 2;
+  const MAX_FILA = 500;          // eventos pendentes; acima disso descarta os mais antigos
+  const MAX_POR_LOTE = 200;      // igual ao limite do backend
+  const INTERVALO_ENVIO_MS = 250;
+  const MAX_ESPERA_RECONEXAO_MS = 10000;
+  const CODIGO_SUBSTITUIDA = 4000; // igual ao backend
+
+  const encoder = new TextEncoder();
+  const decoder = new TextDecoder();
+
+  function FarolSocket(clientId) {
+    this.clientId = clientId || 'unknown';
+    this.fila = [];
+    this.lote = 0;
+    this.ws = null;
+    this.espera = 500;
+    this.ouvintes = [];
+    this.timer = null;
+    this.conectar();
+  }
+
+  FarolSocket.prototype.conectar = function () {
+    const proto = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+    const url = proto + '//' + window.location.host + '/sessao/ws/' + encodeURIComponent(this.clientId);
+    const ws = new WebSocket(url);
+    ws.binaryType = 'arraybuffer';
+    ws.onopen = () => { this.espera = 500; this.agendarEnvio(0); };
+    ws.onmessage = (ev) => this.receber(ev.data);
+    ws.onclose = (ev) => {
+      this.ws = null;
+      // 4000: outra aba/iframe abriu a mesma entrevista; reconectar roubaria a conexão de volta
+      if (ev.code === CODIGO_SUBSTITUIDA) return;
+      setTimeout(() => this.conectar(), this.espera);
+      this.espera = Math.min(this.espera * 2, MAX_ESPERA_RECONEXAO_MS);
+    };
+    this.ws = ws;
+  };
+
+  FarolSocket.prototype.receber = function (dados) {
+    try {
+      const bytes = new Uint8Array(dados);
+      if (bytes[0] !== QUADRO_SERVIDOR) return;
+      const msg = JSON.parse(decoder.decode(bytes.subarray(1)));
+      if (msg.k === 'push') this.ouvintes.forEach((cb) => { try { cb(msg.dados); } catch (_) {} });
+    } catch (_) { /* ignore */ }
+  };
+
+  FarolSocket.prototype.enfileirar = function (evento) {
+    this.fila.push(evento);
+    if (this.fila.length > MAX_FILA) this.fila.splice(0, this.fila.length - MAX_FILA);
+    this.agendarEnvio(this.fila.length >= MAX_POR_LOTE ? 0 : INTERVALO_ENVIO_MS);
+  };
+
+  FarolSocket.prototype.agendarEnvio = function (atraso) {
+    if (this.timer !== null) {
+      if (atraso !== 0) return;
+      clearTimeout(this.timer);
+    }
+    this.timer = setTimeout(() => { this.timer = null; this.enviar(); }, atraso);
+  };
+
+  FarolSocket.prototype.enviar = function () {
+    if (!this.ws || this.ws.readyState !== WebSocket.OPEN || this.fila.length === 0) return;
+    const eventos = this.fila.splice(0, MAX_POR_LOTE);
+    const json = encoder.encode(JSON.stringify({ lote: ++this.lote, eventos }));
+    const quadro = new Uint8Array(json.length + 1);
+    quadro[0] = QUADRO_LOTE;
+    quadro.set(json, 1);
+    this.ws.send(quadro);
+    if (this.fila.length) this.agendarEnvio(INTERVALO_ENVIO_MS);
+  };
+
+  FarolSocket.prototype.log = function (type, message, data) {
+    this.enfileirar({ k: 'log', type, message, data });
+  };
+
+  FarolSocket.prototype.appendTranscript = function (papel, delta, final) {
+    // Junta deltas ainda não enviados do mesmo papel para manter os lotes pequenos
+    const ultimo = this.fila[this.fila.length - 1];
+    if (ultimo && ultimo.k === 'transcricao' && ultimo.papel === papel && !ultimo.final) {
+      ultimo.delta += delta;
+      ultimo.final = !!final;
+      return;
+    }
+    this.enfileirar({ k: 'transcricao', papel, delta, final: !!final });
+  };
+
+  FarolSocket.prototype.onPush = function (cb) { this.ouvintes.push(cb); };
+
+  window.FarolSocket = FarolSocket;
+})();
@@ -4,18 +4,16 @@
   const transcriptsEl = document.getElementById('transcripts');
   const CLIENT_ID = window.FAROL_CLIENT_ID || 'unknown';
 
+  const socket = window.FarolSocket ? new window.FarolSocket(CLIENT_ID) : null;
+
   function setStatus(text) { if (statusEl) statusEl.textContent = text; }
-  async function postLog(type, message, data) {
-    try {
-      await fetch('/logs', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ client_id: CLIENT_ID, type, message, data })
-      });
-    } catch (_) { /* ignore */ }
+  function postLog(type, message, data) {
+    // Vai no próximo lote do WebSocket em vez de um POST por evento
+    if (socket) socket.log(type, message, data);
   }
-  function appendTranscript(prefix, text) {
-    if (!transcriptsEl) return;
+  function appendTranscript(prefix, text, final) {
+    if (socket) socket.appendTranscript(prefix, text, final);
+    if (!transcriptsEl || !text) return;
     const line = `[${prefix}] ${text}`;
     transcriptsEl.textContent = transcriptsEl.textContent ? (transcriptsEl.textContent + "\n" + line) : line;
   }
@@ -130,12 +128,12 @@
           const msg = JSON.parse(ev.data);
           // Heuristics for transcripts and assistant messages
           const type = msg.type || '';
-          if (/transcript|input|user/.test(type)) {
-            const t = msg.text || msg.transcript || msg.content || msg.delta || JSON.stringify(msg);
-            if (t) { appendTranscript('Você', String(t)); postLog('transcript_user', 'recv', { t: String(t).slice(0, 500) }); }
-          } else if (/response|assistant|output/.test(type)) {
-            const t = msg.text || msg.transcript || msg.content || msg.delta || JSON.stringify(msg);
-            if (t) { appendTranscript('Farol', String(t)); postLog('transcript_assistant', 'recv', { t: String(t).slice(0, 500) }); }
+          const final = /done|completed/.test(type);
+          if (/transcript|input|user|response|assistant|output/.test(type)) {
+            const papel = /input|user/.test(type) ? 'Você' : 'Farol';
+            // Eventos "done" do modelo repetem o texto completo que já chegou em deltas
+            const t = (final && papel === 'Farol') ? '' : (msg.delta || msg.transcript || msg.text || msg.content || '');
+            if (t || final) appendTranscript(papel, String(t), final);
           } else {
             postLog('dc_event', 'recv', { type, len: ev.data ? ev.data.length : 0 });
           }
@@ -0,0 +1,62 @@
+import os
+import statistics
+import sys
+import tempfile
+
+from streamlit.testing.v1 import AppTest
+
+# --- BENCHMARK DE NAVEGAÇÃO DO STREAMLIT ---
+# Uso: python bench_render.py [outro_script.py ...]
+# Para cada página, mede o tempo de execução do script no servidor provocado por um clique
+# na sidebar, somando todas as execuções que o clique dispara (um st.rerun() conta duas).
+# Passe outra versão do script para comparar, ex.:
+#   git show <rev>:frontend_streamlit/streamlit_app.py > /tmp/antes.py && python bench_render.py /tmp/antes.py
+# O backend não precisa de estar de pé: as chamadas falham logo e as páginas mostram o aviso.
+#
+# O tempo de parede do AppTest é dominado pelo polling interno dele (time.sleep), por isso
+# cada script corre dentro de um invólucro que cronometra só a execução.
+
+REPETICOES = int(os.getenv("BENCH_REPETICOES", "5"))
+os.environ.setdefault("BACKEND_INTERNAL_URL", "http://127.0.0.1:9")
+
+PAGINAS = [
+    "Cadastro por Voz", "Home", "Vagas", "Hub de Desenvolvimento", "Análise de Matches",
+    "Entrevista (Realtime)", "Simulação em Andamento", "Feedback", "Boas-vindas",
+]
+
+INVOLUCRO = '''
+import time
+import streamlit as st
+_inicio = time.perf_counter()
+try:
+    exec(compile(open({script!r}, encoding="utf-8").read(), {script!r}, "exec"), {{"__name__": "__main__", "__file__": {script!r}}})
+finally:
+    st.session_state.setdefault("_bench_execucoes", []).append((time.perf_counter() - _inicio) * 1000)
+'''
+
+
+def medir(script):
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+        f.write(INVOLUCRO.format(script=os.path.abspath(script)))
+    tempos = {p: [] for p in PAGINAS}
+    execucoes = {}
+    for _ in range(REPETICOES):
+        at = AppTest.from_file(f.name, default_timeout=30)
+        at.run()
+        for pagina in PAGINAS:
+            antes = len(at.session_state["_bench_execucoes"])
+            at = at.button(key=f"navbtn_{pagina}").click().run()
+            assert at.session_state.page == pagina, (script, pagina)
+            novas = at.session_state["_bench_execucoes"][antes:]
+            tempos[pagina].append(sum(novas))
+            execucoes[pagina] = len(novas)
+    os.unlink(f.name)
+    return {p: (statistics.median(ms), execucoes[p]) for p, ms in tempos.items()}
+
+
+scripts = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_app.py")] + sys.argv[1:]
+resultados = {s: medir(s) for s in scripts}
+print(f"--- Clique na sidebar → página desenhada: ms no servidor (mediana de {REPETICOES}) × execuções do script ---")
+print("página".ljust(26) + "".join(os.path.basename(s)[:22].rjust(24) for s in scripts))
+for pagina in PAGINAS:
+    print(pagina.ljust(26) + "".join(f"{resultados[s][pagina][0]:18.2f} × {resultados[s][pagina][1]}" for s in scripts))
@@ -1,10 +1,26 @@
 # streamlit_app.py
 import os
+import html
+import json
+import time
+import uuid
+import logging
+import urllib.parse
+import urllib.request
+from collections import deque
 from contextlib import suppress
+from functools import wraps
 import streamlit as st
 
+# Início da execução do script (mede o tempo de render de cada navegação completa)
+_INICIO_RENDER = time.perf_counter()
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(asctime)s %(levelname)s %(name)s %(message)s")
+logger = logging.getLogger("farol-frontend")
+
 # ========= CONFIG =========
 BACKEND_PUBLIC_URL = os.getenv("BACKEND_PUBLIC_URL", "http://localhost:8011")
+# URL usada pelo próprio servidor Streamlit (dentro do compose é o nome do serviço)
+BACKEND_INTERNAL_URL = os.getenv("BACKEND_INTERNAL_URL", BACKEND_PUBLIC_URL)
 st.set_page_config(
     page_title="FAROL.IA",
     page_icon="🧭",
@@ -13,83 +29,12 @@ st.set_page_config(
 )
 
 # ========= THEME / CSS =========
-st.markdown(
-    """
-    <style>
-      :root{
-        --bg:#add8e6;   /* Azul claro */
-        --bg-2:#bde0f0; /* Azul claro um pouco diferente */
-        --card:#ffffff; 
-        --card-2:#f0f8ff;
-        --muted:#334155; 
-        --txt:#0f172a;  /* Texto escuro para contraste */
-        --edge:#1c2435;
-        --accent:#7c3aed; 
-        --accent-2:#6d28d9;
-        --success: #28a745;
-      }
-      html,body,[data-testid="stAppViewContainer"]{ background:var(--bg)!important; color:var(--txt)!important; }
-      [data-testid="stHeader"]{ background:transparent; }
-      .card{ background:linear-gradient(180deg,var(--card),var(--card-2));
-          border:1px solid var(--edge); border-radius:16px; padding:16px 18px; box-shadow:0 6px 18px rgba(0,0,0,.28);}
-      .title-lg{ font-weight:800; font-size:1.3rem; }
-      .kpis{ display:grid; gap:12px; grid-template-columns: repeat(4, minmax(0,1fr)); }
-      .kpi{ background:#0f1626; border:1px solid var(--edge); border-radius:14px; padding:14px; }
-      .kpi .v{ font-size:1.6rem; font-weight:800; }
-      .divider{ height:1px; background:linear-gradient(90deg, transparent, #22304a, transparent); margin:10px 0 16px; }
-      .page-title{ font-size:1.4rem; font-weight:800; margin:0 0 6px 0; }
-
-      .stProgress > div > div > div > div { background-color: var(--success); }
-
-      .skill-tag {
-        display: inline-block;
-        background-color: #1f2a41;
-        color: #cbd5e1;
-        padding: 4px 10px;
-        border-radius: 15px;
-        font-size: 0.8rem;
-        font-weight: 500;
-        margin-right: 6px;
-        margin-bottom: 6px;
-      }
-
-      section[data-testid="stSidebar"] { background:#0a1220; border-right:1px solid #111827; }
-      .sb-header{ padding:10px 6px 6px 6px; }
-      .sb-badge{
-        display:inline-flex; align-items:center; gap:8px; padding:8px 12px; border-radius:999px;
-        border:1px solid #21314d; background:#0e1523; color:#cbd5e1; font-weight:700;
-      }
-
-      section[data-testid="stSidebar"] .nav-btn > button {
-        width:100%;
-        text-align:left;
-        padding:14px 14px;
-        margin:8px 0;
-        border-radius:14px;
-        border:1px solid #1f2a41;
-        background:#0c1526;
-        color:#e5e7eb;
-        font-weight:700;
-      }
-      section[data-testid="stSidebar"] .nav-btn > button:hover {
-        background:#0f1b34; border-color:#2f3e60;
-      }
-      section[data-testid="stSidebar"] .nav-btn.active > button {
-        background:linear-gradient(180deg,#1b2438,#0f1b2f);
-        border-color:#334155; box-shadow:0 0 0 2px #334155 inset;
-      }
-
-      section[data-testid="stSidebar"] .action-btn > button{
-        width:100%; padding:14px 12px; border-radius:12px; font-weight:700;
-        background:#1b2438; border:1px solid #334155; color:#e5e7eb;
-      }
-      section[data-testid="stSidebar"] .action-btn > button:hover{
-        background:#222d47; border-color:#3b4d6e;
-      }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+# O CSS do tema é um ficheiro estático servido pelo backend (backend/static/farol_tema.css,
+# com ETag): cada execução completa só envia esta tag e o navegador guarda o ficheiro em
+# cache, em vez de receber ~3 KB de <style> a cada navegação. O static do próprio Streamlit
+# serve .css como text/plain com nosniff, e o navegador recusaria a folha de estilo.
+CSS_LINK = f'<link rel="stylesheet" href="{BACKEND_PUBLIC_URL}/static/farol_tema.css">'
+st.markdown(CSS_LINK, unsafe_allow_html=True)
 
 # ========= PÁGINAS =========
 PAGES = [
@@ -107,12 +52,66 @@ PAGES = [
 if "page" not in st.session_state:
     st.session_state.page = PAGES[0][0]
 
+# Identificador da entrevista: o iframe usa-o no WebSocket e a página de simulação lê a transcrição por ele
+if "client_id" not in st.session_state:
+    st.session_state.client_id = str(uuid.uuid4())
+
+# Depois da primeira visita à entrevista o iframe fica montado (oculto) em todas as páginas
+if "entrevista_iniciada" not in st.session_state:
+    st.session_state.entrevista_iniciada = False
+
+# Últimos tempos de render no servidor: (escopo, página, ms)
+if "tempos_render" not in st.session_state:
+    st.session_state.tempos_render = deque(maxlen=50)
+
+def registrar_tempo(escopo, pagina, inicio):
+    ms = (time.perf_counter() - inicio) * 1000
+    st.session_state.tempos_render.append((escopo, pagina, ms))
+    logger.info("render escopo=%s pagina=%s ms=%.1f", escopo, pagina, ms)
+
+def medido(fn):
+    """Mede o tempo de cada execução de uma página (inclui reruns do fragmento)."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            registrar_tempo("pagina", st.session_state.page, inicio)
+    return wrapper
+
+def ir_para(pagina):
+    """Callback de navegação: muda a página antes do rerun, sem precisar de um st.rerun() extra."""
+    st.session_state.page = pagina
+
+# ========= BACKEND =========
+def backend_get(path, timeout=3):
+    """GET no backend; devolve o JSON ou None se o backend não responder."""
+    with suppress(Exception):
+        with urllib.request.urlopen(f"{BACKEND_INTERNAL_URL}{path}", timeout=timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+    return None
+
+def backend_put(path, payload, timeout=3):
+    """PUT com JSON no backend; devolve True se o backend aceitou."""
+    req = urllib.request.Request(
+        f"{BACKEND_INTERNAL_URL}{path}",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="PUT",
+    )
+    with suppress(Exception):
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status < 300
+    return False
+
 # ========= CARD =========
 def card(title, body_md, page_dest=None, footer=None):
     """
     Cria um card (clicável se page_dest for passado).
     """
     if page_dest:
+        # Dentro de um fragmento, st.rerun() faz o rerun completo necessário para trocar de página
         if st.button(f"{title}", key=f"cardbtn_{title}", use_container_width=True):
             st.session_state.page = page_dest
             st.rerun()
@@ -124,6 +123,8 @@ def card(title, body_md, page_dest=None, footer=None):
     st.markdown("</div>", unsafe_allow_html=True)
 
 # ========= PÁGINAS =========
+@st.fragment
+@medido
 def page_boas_vindas():
     st.markdown('<div class="page-title">Bem-vindo ao <b>Farol - Conectando Talentos. Removendo Barreiras</b></div>', unsafe_allow_html=True)
     st.caption("Navegação por voz, descrição de tela e preparação para entrevistas — tudo em um só lugar.")
@@ -136,17 +137,33 @@ def page_boas_vindas():
     with c3:
         card("Simulador de entrevista", "Converse em **tempo real** e receba **feedback**.", page_dest="Entrevista (Realtime)")
 
+@st.fragment
+@medido
 def page_cadastro():
     st.markdown('<div class="page-title">Cadastro guiado por voz</div>', unsafe_allow_html=True)
     with st.form("cadastro_voz"):
         st.text_input("Seu nome", key="cad_nome")
         st.text_input("Objetivo/cargo desejado", placeholder="Ex.: Desenvolvedor(a) Front-end Acessível", key="cad_cargo")
-        st.text_input("Preferência de local/remote/híbrido", key="cad_loc")
+        st.multiselect("Preferência de local/remote/híbrido", ["Remoto","Híbrido","Presencial"], key="cad_loc")
+        st.selectbox("Nível", ["Júnior","Pleno","Sênior"], index=None, placeholder="Selecione", key="cad_nivel")
+        st.text_input("Habilidades (separadas por vírgula)", placeholder="Ex.: React, WAI-ARIA, Testes automatizados", key="cad_hab")
         st.multiselect("Necessidades de acessibilidade", ["Leitor de tela","Alto contraste","Navegação por voz","Subtítulos automáticos"], key="cad_acess")
         st.text_area("Resumo da experiência", height=120, key="cad_exp")
         if st.form_submit_button("Salvar e continuar →"):
-            st.success("Cadastro salvo!")
-
+            perfil = {
+                "nome": st.session_state.cad_nome or None,
+                "habilidades": [h.strip() for h in st.session_state.cad_hab.split(",") if h.strip()],
+                "nivel": st.session_state.cad_nivel,
+                "modelos": st.session_state.cad_loc,
+                "acessibilidade": st.session_state.cad_acess,
+            }
+            if backend_put(f"/matches/candidatos/{st.session_state.client_id}", perfil):
+                st.success("Cadastro salvo!")
+            else:
+                st.warning("Cadastro salvo só nesta sessão: não foi possível enviar o perfil ao backend.")
+
+@st.fragment
+@medido
 def page_home():
     st.markdown('<div class="page-title">Seu painel</div>', unsafe_allow_html=True)
     st.caption("Resumo do seu progresso e recomendações.")
@@ -160,23 +177,56 @@ def page_home():
         st.markdown(f'<div class="kpi"><div style="color:#9fb3c8">{label}</div><div class="v">{val}</div><div style="color:#9fb3c8">{hint}</div></div>', unsafe_allow_html=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
+@st.fragment
+@medido
 def page_vagas():
     st.markdown('<div class="page-title">Busca de Vagas</div>', unsafe_allow_html=True)
+    busca = st.text_input("Buscar por cargo ou requisito", placeholder="Ex.: react, java, acessibilidade")
     colf = st.columns(4)
-    with colf[0]: st.selectbox("Área", ["Desenvolvimento","QA","Design","Dados"])
-    with colf[1]: st.selectbox("Nível", ["Júnior","Pleno","Sênior"])
-    with colf[2]: st.selectbox("Modelo", ["Remoto","Híbrido","Presencial"])
-    with colf[3]: st.multiselect("Acessibilidade", ["Leitor de tela","Alto contraste","Navegação por voz"])
+    with colf[0]: area = st.selectbox("Área", ["Desenvolvimento","QA","Design","Dados"], index=None, placeholder="Todas")
+    with colf[1]: nivel = st.selectbox("Nível", ["Júnior","Pleno","Sênior"], index=None, placeholder="Todos")
+    with colf[2]: modelo = st.selectbox("Modelo", ["Remoto","Híbrido","Presencial"], index=None, placeholder="Todos")
+    with colf[3]: acess = st.multiselect("Acessibilidade", ["Leitor de tela","Alto contraste","Navegação por voz"])
     st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
+
+    params = {"q": busca, "area": area or [], "nivel": nivel or [], "modelo": modelo or [], "acessibilidade": acess, "limite": 9}
+    # Pilha de cursores da paginação; recomeça quando os filtros mudam
+    assinatura = json.dumps(params, sort_keys=True)
+    if st.session_state.get("vagas_assinatura") != assinatura:
+        st.session_state.vagas_assinatura = assinatura
+        st.session_state.vagas_cursores = [None]
+    cursor = st.session_state.vagas_cursores[-1]
+    if cursor is not None:
+        params["cursor"] = cursor
+
+    dados = backend_get(f"/vagas?{urllib.parse.urlencode(params, doseq=True)}")
+    if dados is None:
+        st.warning("Não foi possível contactar o backend para buscar vagas.")
+        return
+    st.caption(f"{dados['total']} vagas encontradas ({dados['tempo_ms']} ms)")
+
     cols = st.columns(3)
-    for i in range(6):
+    for i, vaga in enumerate(dados["resultados"]):
         with cols[i%3]:
             card(
-                f"Vaga #{i+1} — Dev Acessível",
-                "Empresa X · Remoto · **Pleno**\n\nRequisitos: WAI-ARIA, acessibilidade web, testes automatizados.",
-                '<a href="#" style="text-decoration:none" class="btn">Candidatar-se</a>'
+                vaga.get("titulo", "Vaga"),
+                f"{vaga.get('empresa', '')} · {vaga.get('modelo', '')} · **{vaga.get('nivel', '')}**\n\n"
+                f"Requisitos: {', '.join(vaga.get('requisitos') or [])}.",
+                footer='<a href="#" style="text-decoration:none" class="btn">Candidatar-se</a>'
             )
 
+    nav = st.columns(2)
+    with nav[0]:
+        if len(st.session_state.vagas_cursores) > 1 and st.button("← Página anterior"):
+            st.session_state.vagas_cursores.pop()
+            st.rerun(scope="fragment")
+    with nav[1]:
+        if dados["proximo_cursor"] is not None and st.button("Próxima página →"):
+            st.session_state.vagas_cursores.append(dados["proximo_cursor"])
+            st.rerun(scope="fragment")
+
+@st.fragment
+@medido
 def page_hub():
     st.markdown('<div class="page-title">Hub de Desenvolvimento</div>', unsafe_allow_html=True)
     st.caption("Trilhas, cursos e desafios práticos.")
@@ -195,7 +245,7 @@ def page_hub():
     ]
     for i,(t,d) in enumerate(items):
         with cols[i%4]:
-            card(t, d, '<a class="btn" href="#">Iniciar</a>')
+            card(t, d, footer='<a class="btn" href="#">Iniciar</a>')
     
     # ====== NOVA SEÇÃO ======
     st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
@@ -213,66 +263,57 @@ def page_hub():
     ]
     for i,(t,d) in enumerate(rec_items):
         with cols_rec[i%3]:
-            card(t, d, '<a class="btn" href="#">Ver mais</a>')
+            card(t, d, footer='<a class="btn" href="#">Ver mais</a>')
 
 
+@st.fragment
+@medido
 def page_matches():
     st.markdown('<div class="page-title">Análise de Matches</div>', unsafe_allow_html=True)
-    st.caption("Análise de compatibilidade simulada entre vagas e candidatos.")
+    st.caption("Vagas mais compatíveis com o seu cadastro, calculadas pelo motor de matches do backend.")
     st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
 
-    c1, c2 = st.columns(2)
-    with c1:
-        card(
-            "Desenvolvedor Java Sênior (PJe)",
-            """
-            **Candidato:** Mariana Silva
-            
-            **Compatibilidade: 92%**
-            """
-        )
-        st.progress(92)
-        st.markdown(
-            """
-            <div style="margin-top: -10px;">
-                <span class="skill-tag">Java</span>
-                <span class="skill-tag">SQL</span>
-                <span class="skill-tag">Banco de Dados PJe</span>
-                <span class="skill-tag">Comunicação</span>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+    dados = backend_get(f"/matches/candidatos/{st.session_state.client_id}?k=6")
+    if dados is None:
+        st.info("Preencha o **Cadastro por Voz** para ver as vagas compatíveis com o seu perfil.")
+        return
+    if not dados["resultados"]:
+        st.info("Ainda não há vagas cadastradas para comparar com o seu perfil.")
+        return
+
+    cols = st.columns(2)
+    for i, r in enumerate(dados["resultados"]):
+        with cols[i % 2]:
+            card(
+                r["titulo"] or r["vaga_id"],
+                f"""
+                **Candidato:** {r["nome"] or "Você"}
 
-    with c2:
-        card(
-            "Frontend Developer Pleno (Angular)",
-            """
-            **Candidato:** Rafael Costa
-            
-            **Compatibilidade: 85%**
-            """
-        )
-        st.progress(85)
-        st.markdown(
-            """
-            <div style="margin-top: -10px;">
-                <span class="skill-tag">Angular</span>
-                <span class="skill-tag">TypeScript</span>
-                <span class="skill-tag">CSS</span>
-                <span class="skill-tag">Trabalho em Equipe</span>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+                **Compatibilidade: {r["compatibilidade"]}%**
+                """
+            )
+            st.progress(r["compatibilidade"])
+            tags = "".join(f'<span class="skill-tag">{html.escape(h)}</span>' for h in r["habilidades_em_comum"])
+            st.markdown(f'<div style="margin-top: -10px;">{tags}</div>', unsafe_allow_html=True)
 
+@st.fragment
+@medido
 def page_entrevista():
     st.markdown('<div class="page-title">Simulador de Entrevistas (voz em tempo real)</div>', unsafe_allow_html=True)
     st.caption("Ao carregar, o navegador pode pedir permissão de microfone. As respostas tocam automaticamente.")
+    st.info("Se o áudio não tocar, clique na página para liberar o autoplay do navegador. A entrevista continua ativa ao navegar pelas outras páginas.")
+    st.session_state.entrevista_iniciada = True
+
+def iframe_entrevista():
+    """Iframe do realtime, sempre na mesma posição e com os mesmos argumentos.
+
+    Como o elemento não muda entre reruns, o Streamlit não o recria e a sessão de voz
+    sobrevive à navegação; nas outras páginas ele só fica oculto via CSS.
+    """
     st.components.v1.html(
     f"""
     <iframe
-      src="{BACKEND_PUBLIC_URL}/webrtc"
+      src="{BACKEND_PUBLIC_URL}/webrtc?client_id={st.session_state.client_id}"
       title="Farol Realtime"
       width="100%"
       height="380"
@@ -282,12 +323,35 @@ def page_entrevista():
     """,
     height=420,
 )
-    st.info("Se o áudio não tocar, clique na página para liberar o autoplay do navegador.")
 
+CSS_IFRAME_OCULTO = """
+    <style>
+      div.element-container:has(iframe[data-testid="stIFrame"]){
+        position:absolute; left:-10000px; width:1px; height:1px; overflow:hidden;
+      }
+    </style>
+    """
+
+@st.fragment(run_every=2)
+@medido
 def page_simulacao():
     st.markdown('<div class="page-title">Simulação em andamento</div>', unsafe_allow_html=True)
     st.caption("Acompanhe suas falas e as respostas do agente enquanto a entrevista ocorre.")
+    st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
 
+    dados = backend_get(f"/sessao/{st.session_state.client_id}/transcricao")
+    if dados is None:
+        st.warning("Não foi possível contactar o backend para ler a transcrição.")
+        return
+    if not dados["linhas"]:
+        st.info("Ainda não há falas nesta sessão. Inicie a entrevista na página **Entrevista (Realtime)**.")
+    for linha in dados["linhas"]:
+        with st.chat_message("assistant" if linha["papel"] == "Farol" else "user"):
+            st.markdown(f"**{linha['papel']}:** {linha['texto']}")
+    st.caption("🟢 Sessão conectada" if dados["ativa"] else "⚪ Sessão sem conexão ativa")
+
+@st.fragment
+@medido
 def page_feedback():
     st.markdown('<div class="page-title">Feedback da Simulação</div>', unsafe_allow_html=True)
     c1, c2 = st.columns(2)
@@ -297,15 +361,22 @@ def page_feedback():
         card("Oportunidades de melhoria", "- Estruturar STAR\n- Detalhar métricas de impacto\n- Falar de trade-offs")
 
 # ========= SIDEBAR / NAV =========
+@st.cache_resource
+def carregar_option_menu():
+    """Importa o streamlit-option-menu uma única vez por processo (None se não estiver instalado)."""
+    with suppress(Exception):
+        from streamlit_option_menu import option_menu
+        return option_menu
+    return None
+
 def sidebar_nav():
     st.markdown('<div class="sb-header"><span class="sb-badge">  🧭 FAROL.IA</span></div>', unsafe_allow_html=True)
 
-    use_option_menu = False
-    with suppress(Exception):
-        from streamlit_option_menu import option_menu
-        use_option_menu = True
+    option_menu = carregar_option_menu()
 
-    if use_option_menu:
+    # A sidebar roda antes do roteamento, então basta atualizar a página em session_state:
+    # o corpo da nova página é desenhado nesta mesma execução, sem st.rerun().
+    if option_menu is not None:
         icons = ["hand-thumbs-up","pencil-square","house","briefcase","puzzle","bullseye","mic","record-circle","bar-chart"]
         current = option_menu(
             menu_title=None,
@@ -335,47 +406,53 @@ def sidebar_nav():
         )
         if current != st.session_state.page:
             st.session_state.page = current
-            st.rerun()
     else:
         for name, icon in PAGES:
             active_cls = " active" if st.session_state.page == name else ""
             st.markdown(f'<div class="nav-btn{active_cls}">', unsafe_allow_html=True)
-            if st.button(f"{icon}  {name}", key=f"navbtn_{name}", use_container_width=True):
-                st.session_state.page = name
-                st.rerun()
+            st.button(f"{icon}  {name}", key=f"navbtn_{name}", use_container_width=True, on_click=ir_para, args=(name,))
             st.markdown('</div>', unsafe_allow_html=True)
 
     st.divider()
     st.markdown('<div class="action-btn">', unsafe_allow_html=True)
-    if st.button("Ir para Entrevista 🎙️", use_container_width=True):
-        st.session_state.page = "Entrevista (Realtime)"
-        st.rerun()
+    st.button("Ir para Entrevista 🎙️", use_container_width=True, on_click=ir_para, args=("Entrevista (Realtime)",))
     st.markdown('</div>', unsafe_allow_html=True)
     st.caption("Dica: o simulador pedirá acesso ao microfone.")
 
+    with st.expander("Desempenho"):
+        tempos = list(st.session_state.tempos_render)
+        completos = [ms for escopo, _, ms in tempos if escopo == "completo"]
+        paginas = [ms for escopo, _, ms in tempos if escopo == "pagina"]
+        if completos:
+            st.caption(f"Última navegação completa: {completos[-1]:.0f} ms (média {sum(completos)/len(completos):.0f} ms)")
+        if paginas:
+            st.caption(f"Último render de página: {paginas[-1]:.0f} ms")
+
+    # Esconde o iframe da entrevista fora da página dele (posição fixa na sidebar para não deslocar o corpo)
+    st.markdown(CSS_IFRAME_OCULTO if st.session_state.page != "Entrevista (Realtime)" else "", unsafe_allow_html=True)
+
 with st.sidebar:
     sidebar_nav()
 
 # ========= ROTEAMENTO =========
-page = st.session_state.page
-if page == "Boas-vindas":
-    page_boas_vindas()
-elif page == "Cadastro por Voz":
-    page_cadastro()
-elif page == "Home":
-    page_home()
-elif page == "Vagas":
-    page_vagas()
-elif page == "Hub de Desenvolvimento":
-    page_hub()
-elif page == "Análise de Matches":
-    page_matches()
-elif page == "Entrevista (Realtime)":
-    page_entrevista()
-elif page == "Simulação em Andamento":
-    page_simulacao()
-elif page == "Feedback":
-    page_feedback()
+ROTAS = {
+    "Boas-vindas": page_boas_vindas,
+    "Cadastro por Voz": page_cadastro,
+    "Home": page_home,
+    "Vagas": page_vagas,
+    "Hub de Desenvolvimento": page_hub,
+    "Análise de Matches": page_matches,
+    "Entrevista (Realtime)": page_entrevista,
+    "Simulação em Andamento": page_simulacao,
+    "Feedback": page_feedback,
+}
 
+page = st.session_state.page
+# O corpo vai num container fixo no índice 0; o iframe fica sempre logo depois dele
+with st.container():
+    ROTAS.get(page, page_boas_vindas)()
 
+if st.session_state.entrevista_iniciada:
+    iframe_entrevista()
 
+registrar_tempo("completo", page, _INICIO_RENDER)